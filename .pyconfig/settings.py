@@ -17,7 +17,7 @@ import json
 from pathlib import Path
 from typing import NamedTuple
 
-from pyconfig import extract_registries, tuple_to_dict, merge_dicts
+from pyconfig import extract_registries, tuple_to_dict
 
 ###############################################################################
 #
@@ -44,8 +44,11 @@ def settings(clone_dir: Path, cfg: NamedTuple, github: NamedTuple) -> dict:
   #############################################################################
   # CI infrastructure settings
   #############################################################################
-  admin_repo = cfg.ci.images.admin.image.split(":")[0]
-  admin_tag = cfg.ci.images.admin.image.split(":")[-1]
+  # The tag follows the last ":", unless that ":" is part of the registry's
+  # port (e.g. "host:5000/repo"). References without a tag use "latest".
+  admin_repo, _, admin_tag = cfg.ci.images.admin.image.rpartition(":")
+  if not admin_repo or "/" in admin_tag:
+    admin_repo, admin_tag = cfg.ci.images.admin.image, "latest"
   admin_registries = extract_registries(
     repo_org,
     [
@@ -57,43 +60,39 @@ def settings(clone_dir: Path, cfg: NamedTuple, github: NamedTuple) -> dict:
 
   #############################################################################
   # Output generated settings
+  # (overlaid directly on the leaves of the static settings, which are
+  # freshly allocated by tuple_to_dict() and can be updated in place)
   #############################################################################
+  ci = tuple_to_dict(cfg.ci)
+  ci["images"]["admin"] |= {
+    "login": {
+      "dockerhub": "dockerhub" in admin_registries,
+      "github": "github" in admin_registries,
+    },
+    "repo": admin_repo,
+    "tag": admin_tag,
+    "tags_config": admin_tag,
+    "build_platforms_config": admin_build_platforms_config,
+  }
+
+  debian = tuple_to_dict(cfg.debian)
+  debian["builder"] |= {
+    "base_images_matrix": debian_builder_base_images_matrix,
+    "architectures_matrix": debian_builder_architectures_matrix,
+    "build_platforms_config": debian_builder_docker_build_platforms,
+    "login": {
+      "dockerhub": "dockerhub" in debian_builder_registries,
+      "github": "github" in debian_builder_registries,
+    },
+  }
+
   return {
     ###########################################################################
     # CI config
     ###########################################################################
-    "ci": merge_dicts(
-      {
-        "images": {
-          "admin": {
-            "login": {
-              "dockerhub": "dockerhub" in admin_registries,
-              "github": "github" in admin_registries,
-            },
-            "repo": admin_repo,
-            "tag": admin_tag,
-            "tags_config": admin_tag,
-            "build_platforms_config": admin_build_platforms_config,
-          },
-        },
-      },
-      tuple_to_dict(cfg.ci),
-    ),
+    "ci": ci,
     ###########################################################################
     # Debian config
     ###########################################################################
-    "debian": merge_dicts(
-      {
-        "builder": {
-          "base_images_matrix": debian_builder_base_images_matrix,
-          "architectures_matrix": debian_builder_architectures_matrix,
-          "build_platforms_config": debian_builder_docker_build_platforms,
-          "login": {
-            "dockerhub": "dockerhub" in debian_builder_registries,
-            "github": "github" in debian_builder_registries,
-          },
-        },
-      },
-      tuple_to_dict(cfg.debian),
-    ),
+    "debian": debian,
   }
@@ -3,7 +3,7 @@ import sys
 import argparse
 from datetime import timedelta
 from pathlib import Path
-import shlex
+from typing import Callable
 import subprocess
 
 from .globals import ScriptNoninteractiveRequired, script_noninteractive, RepoDir, ScriptsDir
@@ -29,9 +29,11 @@ class Admin:
       token: str | None = None,
       capture_output: bool=False) -> str | None:
     cwd = Path(cwd) if cwd else Path.cwd()
+    # Arguments are passed directly to the process (no shell), so they
+    # must not be quoted
     args = [
-      shlex.quote(arg)
-      for arg in args.strip().splitlines() if arg
+      arg
+      for arg in args.strip().splitlines()
       for arg in [arg.strip()] if arg
     ] if args else []
     if not token:
@@ -86,93 +88,59 @@ class Admin:
       parser.print_help()
       sys.exit(1)
 
+    action = cls.define_actions().get(args.action)
+    if action is None:
+      raise RuntimeError("action not implemented", args.action)
+
     try:
-      if args.action == "pr-closed":
-        cls.pr_closed(
-          repo=args.repository,
-          pr_no=args.number,
-          merged=args.merged,
-          noop=args.noop,
-        )
-      elif args.action == "pr-runs":
-        cls.pr_runs(repo=args.repository, pr_no=args.number)
-      elif args.action == "select-runs":
-        cls.select_runs(repo=args.repository, filter=args.filter, input=args.input)
-      elif args.action == "delete-runs":
-        cls.delete_runs(
-          repo=args.repository,
-          filter=args.filter,
-          noop=args.noop,
-          input=args.input)
-      elif args.action == "select-packages":
-        cls.select_packages(org=args.org, filter=args.filter)
-      elif args.action == "select-versions":
-        cls.select_versions(package=args.package, org=args.org, filter=args.filter, tags=args.tag)
-      elif args.action == "delete-versions":
-        cls.delete_versions(
-          package=args.package,
-          org=args.org,
-          filter=args.filter,
-          noop=args.noop,
-          if_package_exists=args.if_package_exists)
-      # elif args.action == "prune-versions":
-      #   all = PackageVersion.select(package=args.package, org=args.org)
-
-      #   if args.prunable:
-      #     if args.prunable == "-":
-      #       def _prunable():
-      #         return sys.stdin.readlines()
-      #     else:
-      #       def _prunable():
-      #         return Path(args.prunable).read_text().splitlines()
-      #     prunable_names = [
-      #       line
-      #       for line in _prunable()
-      #       for line in [line.strip()]
-      #       if line
-      #     ]
-      #   elif args.required:
-      #     if args.required == "-":
-      #       def _required():
-      #         return sys.stdin.readlines()
-      #     else:
-      #       def _required():
-      #         return Path(args.required).read_text().splitlines()
-      #     required_names = [
-      #       line
-      #       for line in _required()
-      #       for line in [line.strip()]
-      #       if line
-      #     ]
-      #     prunable_names = [v.name for v in all if v.name not in required_names]
-      #   else:
-      #     raise RuntimeError("one of --prunable or --required is required")
-
-      #   prunable = [pkg for pkg in all if pkg.name in prunable_names]
-
-      #   tabulate_columns(*PackageVersion._fields)
-      #   for version in PackageVersion.delete(
-      #       package=args.package,
-      #       org=args.org,
-      #       versions=prunable,
-      #       noop=args.noop,
-      #     ):
-      #       output(str(version))
-      elif args.action == "prune-versions":
-        cls.prune_versions_untagged(
-          package=args.package,
-          org=args.org,
-          min_age=timedelta(days=args.min_age) if args.min_age else None,
-          noop=args.noop)
-      elif args.action == "nightly-cleanup":
-        cls.nightly_cleanup(repo=args.repository, noop=args.noop)
-      else:
-        raise RuntimeError("action not implemented", args.action)
+      action(args)
     finally:
       if TabulateOutput:
         TabulateOutput.stdin.close()
 
 
+  ###############################################################################
+  # Map each action to a handler which receives the parsed command-line arguments
+  ###############################################################################
+  @classmethod
+  def define_actions(cls) -> dict[str, Callable[[argparse.Namespace], None]]:
+    return {
+      "pr-closed": lambda args: cls.pr_closed(
+        repo=args.repository,
+        pr_no=args.number,
+        merged=args.merged,
+        noop=args.noop),
+      "pr-runs": lambda args: cls.pr_runs(repo=args.repository, pr_no=args.number),
+      "select-runs": lambda args: cls.select_runs(
+        repo=args.repository,
+        filter=args.filter,
+        input=args.input),
+      "delete-runs": lambda args: cls.delete_runs(
+        repo=args.repository,
+        filter=args.filter,
+        noop=args.noop,
+        input=args.input),
+      "select-packages": lambda args: cls.select_packages(org=args.org, filter=args.filter),
+      "select-versions": lambda args: cls.select_versions(
+        package=args.package,
+        org=args.org,
+        filter=args.filter,
+        tags=args.tag),
+      "delete-versions": lambda args: cls.delete_versions(
+        package=args.package,
+        org=args.org,
+        filter=args.filter,
+        noop=args.noop,
+        if_package_exists=args.if_package_exists),
+      "prune-versions": lambda args: cls.prune_versions_untagged(
+        package=args.package,
+        org=args.org,
+        min_age=timedelta(days=args.min_age) if args.min_age else None,
+        noop=args.noop),
+      "nightly-cleanup": lambda args: cls.nightly_cleanup(repo=args.repository, noop=args.noop),
+    }
+
+
   ###############################################################################
   # Command-line arguments parser
   ###############################################################################
@@ -377,7 +345,7 @@ class Admin:
       output("DEL" if removed else "KEEP", str(run))
 
   @classmethod
-  def pr_runs(cls, repo, pr_no, noop) -> None:
+  def pr_runs(cls, repo, pr_no) -> None:
     tabulate_columns(*WorkflowRun._fields)
     for run in pr_runs(repo=repo, pr_no=pr_no):
       output(str(run))
@@ -1,7 +1,8 @@
-import re
+import ast
 import traceback
-from typing import NamedTuple
+from typing import NamedTuple, BinaryIO, Generator
 from datetime import datetime
+from functools import lru_cache
 
 from cli_helper.log import log
 from .date import github_date_parse, github_date_str
@@ -10,27 +11,31 @@ from .date import github_date_parse, github_date_str
 # Helper for data objects
 ###############################################################################
 class DataObject:
-  Parsers = {}
-
   @classmethod
   def build(cls, obj_cls: type[NamedTuple], *args) -> NamedTuple:
-    cls.data_object(obj_cls)
-    build_args = list(args)
-    for i, arg in enumerate(args):
-      if i in obj_cls.DatetimeFields:
+    build_args = []
+    for field_kind, arg in zip(_build_plan(obj_cls), args):
+      if field_kind is _DatetimeField:
         if not isinstance(arg, datetime):
-          build_args[i] = github_date_parse(arg)
+          arg = github_date_parse(arg)
+      elif field_kind is _TupleField:
+        if isinstance(arg, str):
+          # Tuples are printed as Python lists, e.g. "['latest', 'stable']"
+          arg = ast.literal_eval(arg.strip())
+        arg = tuple(arg or ())
       elif isinstance(arg, str):
-        build_args[i] = arg.strip()
-    return obj_cls(*build_args)
+        arg = arg.strip()
+      build_args.append(arg)
+    return obj_cls._make(build_args)
 
   @classmethod
   def parse(cls, obj_cls: type[NamedTuple], obj_line: str) -> object | None:
-    cls.data_object(obj_cls)
+    # Lines are generated by DataObject.str(), so fields are separated by a single tab
+    # and only the last one may contain additional tabs.
     try:
-      parse_re = cls.Parsers[obj_cls]
-      fields = parse_re.findall(obj_line)
-      fields = fields[0]
+      fields = obj_line.split("\t", len(obj_cls._fields) - 1)
+      if len(fields) != len(obj_cls._fields):
+        raise ValueError("unexpected number of fields", len(fields))
       return cls.build(obj_cls, *fields)
     except Exception:
       log.error("failed to parse {}: '{}'", obj_cls.__qualname__, obj_line)
@@ -42,27 +47,25 @@ class DataObject:
     fields = list(obj)
     for i in obj.DatetimeFields:
       fields[i] = github_date_str(fields[i])
+    for i in getattr(obj, "TupleFields", ()):
+      fields[i] = list(fields[i])
     return "\t".join(map(str, fields))
 
-  @classmethod
-  def parse_re(cls, obj_cls: type[NamedTuple]) -> re.Pattern:
-    # Parse a string of fields separated by tabs.
-    assert len(obj_cls._fields) >= 1
-    return re.compile(
-      "".join(
-        (
-          "^",
-          *(r"([^\t]+)[\t]+" for i in range(len(obj_cls._fields) - 1)),
-          r"(.*)",
-          "$",
-        )
-      )
-    )
 
-  @classmethod
-  def data_object(cls, obj_cls: type[NamedTuple]) -> None:
-    if obj_cls not in cls.Parsers:
-      cls.Parsers[obj_cls] = cls.parse_re(obj_cls)
+###############################################################################
+# Compute (once per class) which fields must be converted to datetime/tuple
+###############################################################################
+_DatetimeField = "datetime"
+_TupleField = "tuple"
+
+@lru_cache(maxsize=None)
+def _build_plan(obj_cls: type[NamedTuple]) -> tuple[str | None, ...]:
+  tuple_fields = getattr(obj_cls, "TupleFields", frozenset())
+  return tuple(
+    _DatetimeField if i in obj_cls.DatetimeFields
+    else _TupleField if i in tuple_fields
+    else None
+    for i in range(len(obj_cls._fields)))
 
 
 ###############################################################################
@@ -78,3 +81,17 @@ def parse(obj_cls: type[NamedTuple], package_line) -> NamedTuple:
 def build(obj_cls: type[NamedTuple], *args) -> object | None:
   return DataObject.build(obj_cls, *args)
 
+
+
+###############################################################################
+# Parse the objects read from a stream of lines (e.g. the output of fzf).
+# Lines are parsed as they are read, and empty or invalid lines are skipped.
+###############################################################################
+def iter_parsed(obj_cls: type[NamedTuple], input_stream: BinaryIO) -> Generator[NamedTuple, None, None]:
+  for line in input_stream:
+    sline = line.decode().strip()
+    if not sline:
+      continue
+    obj = DataObject.parse(obj_cls, sline)
+    if obj is not None:
+      yield obj
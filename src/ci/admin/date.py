@@ -6,9 +6,25 @@ from datetime import datetime, timezone
 GitHubDateFormat = "%Y-%m-%dT%H:%M:%SZ"
 
 def github_date_parse(date: str) -> datetime:
+  # GitHub always returns fixed-width timestamps (YYYY-MM-DDTHH:MM:SSZ),
+  # so slice the fields directly instead of going through strptime(),
+  # which still validates (and rejects) anything else
+  if len(date) == 20 and date[4::3] == "--T::Z":
+    return datetime(
+      int(date[0:4]),
+      int(date[5:7]),
+      int(date[8:10]),
+      int(date[11:13]),
+      int(date[14:16]),
+      int(date[17:19]),
+      tzinfo=timezone.utc)
   parsed = datetime.strptime(date, GitHubDateFormat)
   return parsed.replace(tzinfo=timezone.utc)
 
 def github_date_str(date: datetime) -> str:
-  result = date.replace(tzinfo=timezone.utc)
-  return result.strftime(GitHubDateFormat)
+  # Dates returned by github_date_parse() are already in UTC
+  result = date if date.tzinfo is timezone.utc else date.replace(tzinfo=timezone.utc)
+  return (
+    f"{result.year:04d}-{result.month:02d}-{result.day:02d}"
+    f"T{result.hour:02d}:{result.minute:02d}:{result.second:02d}Z"
+  )
@@ -4,7 +4,17 @@ from .globals import script_noninteractive
 from cli_helper.log import log
 
 ###############################################################################
-# Filter a list using fzf
+# Check whether fzf will run non-interactively (i.e. with --filter)
+###############################################################################
+def fzf_noninteractive(noninteractive: bool = False) -> bool:
+  return noninteractive or script_noninteractive()
+
+
+###############################################################################
+# Filter a list using fzf.
+# In non-interactive mode, matches are printed in reverse input order
+# (because of --tac and --no-sort). In interactive mode, selected entries are
+# printed in the order in which they were selected.
 ###############################################################################
 def fzf_filter(
   filter: str | None = None,
@@ -13,7 +23,7 @@ def fzf_filter(
   prompt: str | None = None,
   noninteractive: bool = False,
 ) -> subprocess.Popen:
-  noninteractive = noninteractive or script_noninteractive()
+  noninteractive = fzf_noninteractive(noninteractive)
   if noninteractive:
     filter_arg = "--filter"
   else:
@@ -41,10 +51,7 @@ def fzf_filter(
   log.command(fzf_cmd)
   fzf = subprocess.Popen(fzf_cmd, stdout=subprocess.PIPE, stdin=subprocess.PIPE)
   if inputs:
-    for run in inputs:
-      line = str(run).strip()
-      fzf.stdin.write(line.encode())
-      fzf.stdin.write("\n".encode())
+    fzf.stdin.writelines(f"{str(run).strip()}\n".encode() for run in inputs)
     if not keep_stdin_open:
       fzf.stdin.close()
   return fzf
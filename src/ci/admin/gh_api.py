@@ -1,67 +1,165 @@
+import re
 import json
+import time
+import tempfile
+import traceback
 import subprocess
+from typing import Generator
 from itertools import chain
+from email.message import Message
 
 from cli_helper.log import log
-
-# GitHub API documentation: https://docs.github.com/en/rest/reference/packages
-GitHubApiAccept = "application/vnd.github.v3+json"
-# https://docs.github.com/en/rest/overview/api-versions?apiVersion=2022-11-28
-GitHubApiVersion = "2022-11-28"
+from cli_helper.json_codec import json_loads
+from .gh_client import (
+  GitHubApiAccept, GitHubApiVersion, GitHubApiError, gh_token, gh_request_pages, gh_paginated_url,
+  gh_retry_delay, GitHubApiMaxRetries)
 
 ###############################################################################
-# Make a GH API call, filter the result with jq, and parse the resulting JSON
+# Make a GH API call, and parse the resulting JSON.
+# Requests are sent over a persistent connection if a GitHub token is
+# available, otherwise they are delegated to the `gh` CLI.
 ###############################################################################
 def gh_api(
   url: str,
-  jq_filter: str | None = None,
   default: object = None,
   noop: bool = False,
   method: str = "GET",
+  paginate: bool = True,
+) -> dict | list | None:
+  if not gh_token():
+    return _gh_cli_api(url, default, noop, method, paginate)
+
+  log.command([method, url])
+  if noop and method != "GET":
+    return default
+
+  try:
+    values = []
+    for response in gh_request_pages(url, method=method, paginate=paginate):
+      if not response.body or response.body.isspace():
+        continue
+      values.append(json_loads(response.body))
+  except json.JSONDecodeError:
+    log.error("failed to parse result as JSON")
+    traceback.print_exc()
+    return default
+
+  if not values:
+    return default
+  elif len(values) == 1:
+    return values[0]
+  elif all(isinstance(v, list) for v in values):
+    return list(chain.from_iterable(values))
+  return values
+
+
+###############################################################################
+# Extract the HTTP status of a failed request from the `gh` CLI's error
+# message (which doesn't include the response's headers)
+###############################################################################
+def _gh_cli_status(gh_stderr: bytes) -> int | None:
+  status = re.search(rb"\(HTTP (\d+)\)", gh_stderr)
+  return int(status.group(1)) if status else None
+
+
+###############################################################################
+# Make a GH API call using the `gh` CLI
+###############################################################################
+def _gh_cli_api(
+  url: str,
+  default: object = None,
+  noop: bool = False,
+  method: str = "GET",
+  paginate: bool = True,
 ) -> dict | list | None:
+  paginate = paginate and method == "GET"
   gh_cmd = [
-    "gh", "api", "--paginate",
+    "gh", "api", *(["--paginate"] if paginate else []),
     "-H", f"Accept: {GitHubApiAccept}",
     "-H", f"X-GitHub-Api-Version: {GitHubApiVersion}",
     *(["-X", method] if method else []),
-    url
+    gh_paginated_url(url) if paginate else url,
   ]
-  if jq_filter:
-    gh_cmd.extend(["--jq", jq_filter])
 
   log.command(gh_cmd)
   if noop and method != "GET":
     return default
 
-  gh_process = subprocess.Popen(gh_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-  if jq_filter:
-    jq_result = subprocess.run(["jq", "-s"], check=True, stdin=gh_process.stdout, stdout=subprocess.PIPE)
-  
-  gh_stdout, gh_stderr = gh_process.communicate()
+  for attempt in range(GitHubApiMaxRetries + 1):
+    gh_process = subprocess.Popen(gh_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, gh_stderr = gh_process.communicate()
+    if gh_process.returncode == 0:
+      break
+    status = _gh_cli_status(gh_stderr)
+    delay = gh_retry_delay(status, Message(), stdout + gh_stderr, attempt)
+    if delay is None:
+      raise GitHubApiError("gh api call failed", gh_cmd,
+        stdout, gh_stderr, status=status)
+    log.warning("rate limited by GitHub, retrying {} {} in {:.0f}s", method, url, delay)
+    time.sleep(delay)
 
-  if gh_process.returncode != 0:
-    raise RuntimeError("gh api call failed", gh_cmd,
-      gh_stdout, gh_stderr)
-
-  if jq_filter:
-    stdout = jq_result.stdout
-  else:
-    stdout = gh_stdout
-
-  stdout = stdout.decode().strip() if stdout else ""
-
-  if not stdout:
+  # json_loads() accepts bytes directly, so avoid decoding the whole response
+  if not stdout or stdout.isspace():
     return default
 
   try:
-    result = json.loads(stdout)
-    if jq_filter and result and isinstance(next(iter(result)), list):
-      # Flatten slurped arrays
-      result = list(chain.from_iterable(result))
-    return result
-  except Exception as e:
+    return json_loads(stdout)
+  except Exception:
     log.error("failed to parse result as JSON")
-    log.exception(e)
-    log.error("JSON parse input:\n{}", stdout)
+    traceback.print_exc()
+    log.error("JSON parse input:\n{}", stdout.decode(errors="replace"))
     return default
+
+
+###############################################################################
+# Make a paginated GH API call, and stream the entries returned in each page.
+# If the entries are not the top-level array, but are nested in an object,
+# specify the object's key with `entries`.
+# Each entry is yielded separately, without buffering the whole response.
+###############################################################################
+def gh_api_stream(
+  url: str,
+  entries: str | None = None,
+) -> Generator[dict, None, None]:
+  if gh_token():
+    log.command(["GET", url])
+    for response in gh_request_pages(url):
+      page = json_loads(response.body)
+      yield from (page[entries] if entries else page)
+    return
+
+  gh_cmd = [
+    "gh", "api", "--paginate",
+    "-H", f"Accept: {GitHubApiAccept}",
+    "-H", f"X-GitHub-Api-Version: {GitHubApiVersion}",
+    gh_paginated_url(url),
+    # gh prints every entry as compact JSON on its own line
+    "--jq", f".{entries}[]" if entries else ".[]",
+  ]
+  log.command(gh_cmd)
+  for attempt in range(GitHubApiMaxRetries + 1):
+    # Collect stderr in a file, so that gh never blocks writing to it while
+    # its output is being consumed
+    with tempfile.TemporaryFile() as gh_stderr_f:
+      gh_process = subprocess.Popen(gh_cmd, stdout=subprocess.PIPE, stderr=gh_stderr_f)
+      yielded = 0
+      try:
+        for line in gh_process.stdout:
+          if not line.strip():
+            continue
+          yielded += 1
+          yield json_loads(line)
+      finally:
+        gh_process.stdout.close()
+        gh_process.wait()
+      if gh_process.returncode == 0:
+        return
+      gh_stderr_f.seek(0)
+      gh_stderr = gh_stderr_f.read()
+    status = _gh_cli_status(gh_stderr)
+    # Entries that were already returned would be repeated by a retry
+    delay = None if yielded else gh_retry_delay(status, Message(), gh_stderr, attempt)
+    if delay is None:
+      raise GitHubApiError("gh api call failed", gh_cmd, gh_stderr, status=status)
+    log.warning("rate limited by GitHub, retrying GET {} in {:.0f}s", url, delay)
+    time.sleep(delay)
@@ -0,0 +1,267 @@
+import os
+import re
+import base64
+import time
+import hashlib
+import threading
+import subprocess
+from pathlib import Path
+from functools import lru_cache
+from typing import NamedTuple, Generator
+from email.message import Message
+
+from cli_helper.log import log
+from cli_helper.json_codec import json_loads, json_dumps
+from cli_helper.http_client import http_send, manifest_request
+
+# GitHub API documentation: https://docs.github.com/en/rest/reference/packages
+GitHubApiAccept = "application/vnd.github.v3+json"
+# https://docs.github.com/en/rest/overview/api-versions?apiVersion=2022-11-28
+GitHubApiVersion = "2022-11-28"
+GitHubApiHost = "api.github.com"
+GitHubApiUrl = f"https://{GitHubApiHost}"
+# Maximum number of entries per page supported by list endpoints
+GitHubApiPageSize = 100
+# Requests rejected by GitHub's rate limits are retried (with exponential
+# backoff, unless GitHub specifies how long to wait) at most this many times
+GitHubApiMaxRetries = 5
+# GitHub asks to wait at least a minute when it doesn't specify a delay
+# (https://docs.github.com/en/rest/using-the-rest-api/rate-limits-for-the-rest-api)
+GitHubApiRetryDelay = 60
+# GitHub's container registry, and the manifest types used by multi-platform images
+GhcrHost = "ghcr.io"
+GhcrManifestAccept = ", ".join([
+  "application/vnd.oci.image.index.v1+json",
+  "application/vnd.docker.distribution.manifest.list.v2+json",
+])
+
+# Successful GET responses are cached in memory for the duration of the
+# process. They can also be persisted on disk (and shared between
+# invocations) by setting CI_ADMIN_GH_CACHE_TTL to a number of seconds.
+# Responses cached on disk are not invalidated by changes made by other
+# processes, so they may be out of date for up to the TTL.
+GitHubApiCacheDir = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "ci-admin" / "gh"
+GitHubApiCacheTtl = int(os.environ.get("CI_ADMIN_GH_CACHE_TTL") or 0)
+
+_ResponseCache: dict[str, "GitHubResponse"] = {}
+# Paths of the resources modified by this process, whose responses cached
+# on disk (possibly by another process) must not be used anymore
+_InvalidatedPaths: set[str] = set()
+_ResponseCacheLock = threading.Lock()
+
+
+###############################################################################
+# Error raised when a request to the GitHub API fails. The HTTP status is
+# None if it couldn't be determined.
+###############################################################################
+class GitHubApiError(RuntimeError):
+  def __init__(self, *args: object, status: int | None = None) -> None:
+    super().__init__(*args)
+    self.status = status
+
+
+###############################################################################
+# Response returned by gh_request()
+###############################################################################
+class GitHubResponse(NamedTuple):
+  status: int
+  headers: Message
+  body: bytes
+
+  @property
+  def next_url(self) -> str | None:
+    link = self.headers.get("Link")
+    if not link:
+      return None
+    next_link = re.search(r'<([^>]+)>;\s*rel="next"', link)
+    return next_link.group(1) if next_link else None
+
+
+###############################################################################
+# Look up the token used to authenticate with GitHub (only once).
+# Return None if no token is available, in which case callers should fall
+# back to the `gh` CLI.
+###############################################################################
+@lru_cache(maxsize=None)
+def gh_token() -> str | None:
+  token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+  if token:
+    return token
+  try:
+    result = subprocess.run(
+      ["gh", "auth", "token"],
+      stdout=subprocess.PIPE,
+      stderr=subprocess.DEVNULL,
+      check=True)
+  except Exception:
+    return None
+  return result.stdout.decode().strip() or None
+
+
+###############################################################################
+# Perform a request to the GitHub API over a persistent connection
+###############################################################################
+def gh_request(
+  url: str,
+  method: str = "GET",
+  body: bytes | None = None,
+  accept: str = GitHubApiAccept,
+) -> GitHubResponse:
+  if url.startswith(GitHubApiUrl):
+    url = url[len(GitHubApiUrl):]
+  headers = {
+    "Accept": accept,
+    "X-GitHub-Api-Version": GitHubApiVersion,
+    "Authorization": f"Bearer {gh_token()}",
+  }
+  if body is not None:
+    headers["Content-Type"] = "application/json"
+  cache_key = f"{accept} {url}"
+  if method == "GET":
+    cached = _gh_cache_get(cache_key)
+    if cached is not None:
+      log.debug("cached response for {}", url)
+      return cached
+  else:
+    # The request might modify the resource, and any of its parents or children
+    _gh_cache_invalidate(url)
+  for attempt in range(GitHubApiMaxRetries + 1):
+    result = GitHubResponse(*http_send(GitHubApiHost, method, url, body, headers))
+    delay = gh_retry_delay(result.status, result.headers, result.body, attempt)
+    if delay is None:
+      break
+    log.warning("rate limited by GitHub, retrying {} {} in {:.0f}s", method, url, delay)
+    time.sleep(delay)
+  if method == "GET" and result.status < 300:
+    _gh_cache_put(cache_key, result)
+  return result
+
+
+###############################################################################
+# Return how long to wait before retrying a request rejected by one of
+# GitHub's rate limits (with a 403 or 429 status), or None if the request
+# failed for any other reason, or if it shouldn't be retried anymore.
+###############################################################################
+def gh_retry_delay(status: int | None, headers: Message, body: bytes, attempt: int) -> float | None:
+  if status not in (403, 429) or attempt >= GitHubApiMaxRetries:
+    return None
+  retry_after = headers.get("Retry-After")
+  if retry_after:
+    return float(retry_after)
+  if headers.get("X-RateLimit-Remaining") == "0":
+    return max(1.0, int(headers.get("X-RateLimit-Reset", 0)) - time.time())
+  # Other 403 responses are permission errors
+  if status == 403 and b"rate limit" not in body.lower():
+    return None
+  return GitHubApiRetryDelay * 2 ** attempt
+
+
+###############################################################################
+# Retrieve the manifest of an image from GitHub's container registry.
+# The registry accepts the base64-encoded GitHub token as a bearer token.
+###############################################################################
+def ghcr_manifest(image: str, reference: str, accept: str = GhcrManifestAccept) -> dict:
+  response = manifest_request(GhcrHost, image, reference, accept,
+    authorization=f"Bearer {base64.b64encode(gh_token().encode()).decode()}")
+  if response.status >= 400:
+    raise RuntimeError("failed to retrieve image manifest",
+      f"{GhcrHost}/{image}:{reference}", response.status, response.body.decode(errors="replace"))
+  return json_loads(response.body)
+
+
+###############################################################################
+# Cache of GET responses, keyed by Accept header and URL
+###############################################################################
+def _gh_cache_file(cache_key: str) -> Path:
+  return GitHubApiCacheDir / f"{hashlib.sha256(cache_key.encode()).hexdigest()}.json"
+
+
+def _gh_cache_path(url: str) -> str:
+  return url.partition("?")[0].rstrip("/")
+
+
+def _gh_cache_paths_overlap(path: str, other: str) -> bool:
+  return path == other or path.startswith(f"{other}/") or other.startswith(f"{path}/")
+
+
+def _gh_cache_get(cache_key: str) -> GitHubResponse | None:
+  path = _gh_cache_path(cache_key.rpartition(" ")[2])
+  with _ResponseCacheLock:
+    cached = _ResponseCache.get(cache_key)
+    invalidated = any(_gh_cache_paths_overlap(path, p) for p in _InvalidatedPaths)
+  if cached is not None or invalidated or GitHubApiCacheTtl <= 0:
+    return cached
+  cache_file = _gh_cache_file(cache_key)
+  try:
+    if time.time() - cache_file.stat().st_mtime > GitHubApiCacheTtl:
+      return None
+    entry = json_loads(cache_file.read_bytes())
+  except (OSError, ValueError):
+    return None
+  headers = Message()
+  if entry.get("link"):
+    headers["Link"] = entry["link"]
+  cached = GitHubResponse(entry["status"], headers, entry["body"].encode())
+  with _ResponseCacheLock:
+    _ResponseCache[cache_key] = cached
+  return cached
+
+
+def _gh_cache_put(cache_key: str, response: GitHubResponse) -> None:
+  with _ResponseCacheLock:
+    _ResponseCache[cache_key] = response
+  if GitHubApiCacheTtl <= 0:
+    return
+  entry = {
+    "status": response.status,
+    "link": response.headers.get("Link"),
+    "body": response.body.decode(errors="replace"),
+  }
+  try:
+    GitHubApiCacheDir.mkdir(parents=True, exist_ok=True)
+    _gh_cache_file(cache_key).write_bytes(json_dumps(entry))
+  except OSError as e:
+    log.debug("failed to cache response on disk: {}", e)
+
+
+def _gh_cache_invalidate(url: str) -> None:
+  # Only drop the responses in memory. Files cached on disk are ignored
+  # instead (and overwritten when the resource is requested again), so that
+  # concurrent requests don't have to scan the cache directory.
+  path = _gh_cache_path(url)
+  with _ResponseCacheLock:
+    _InvalidatedPaths.add(path)
+    for cache_key in [
+        k for k in _ResponseCache
+          if _gh_cache_paths_overlap(path, _gh_cache_path(k.rpartition(" ")[2]))]:
+      del _ResponseCache[cache_key]
+
+
+###############################################################################
+# Request the largest page size supported by the API (unless the URL already
+# specifies one), to minimize the number of requests to list all entries
+###############################################################################
+def gh_paginated_url(url: str) -> str:
+  if re.search(r"[?&]per_page=", url):
+    return url
+  return f"{url}{'&' if '?' in url else '?'}per_page={GitHubApiPageSize}"
+
+
+###############################################################################
+# Perform a request and follow the `Link: rel="next"` headers of the responses
+###############################################################################
+def gh_request_pages(
+  url: str,
+  method: str = "GET",
+  paginate: bool = True,
+) -> Generator[GitHubResponse, None, None]:
+  paginate = paginate and method == "GET"
+  next_url = gh_paginated_url(url) if paginate else url
+  while next_url:
+    response = gh_request(next_url, method=method)
+    if response.status >= 400:
+      raise GitHubApiError("GitHub API request failed",
+        method, next_url, response.status, response.body.decode(errors="replace"),
+        status=response.status)
+    yield response
+    next_url = response.next_url if paginate else None
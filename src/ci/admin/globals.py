@@ -1,10 +1,47 @@
 import sys
 from pathlib import Path
+from typing import Callable, TypeVar
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cli_helper.log import log
 
 
 RepoDir = Path(__file__).parent.parent.parent.parent
 ScriptsDir = RepoDir / "scripts"
 
+# Maximum number of concurrent delete requests sent to GitHub
+DeleteWorkers = 10
+
+T = TypeVar("T")
+
+###############################################################################
+# Delete every entry with an independent (concurrent) request.
+# Wait for all requests to complete, and return the entries that were
+# deleted, and those that couldn't be deleted (with the error).
+###############################################################################
+def delete_concurrently(
+  delete: Callable[[T], object],
+  entries: list[T],
+) -> tuple[list[T], list[tuple[T, Exception]]]:
+  failed = []
+  completed = set()
+  if not entries:
+    return [], failed
+  with ThreadPoolExecutor(max_workers=min(DeleteWorkers, len(entries))) as executor:
+    deletions = {executor.submit(delete, entry): i for i, entry in enumerate(entries)}
+    for deletion in as_completed(deletions):
+      i = deletions[deletion]
+      try:
+        deletion.result()
+      except Exception as e:
+        log.error("failed to delete {}: {}", entries[i], e)
+        failed.append((entries[i], e))
+      else:
+        completed.add(i)
+  # Preserve the order of the entries
+  deleted = [entry for i, entry in enumerate(entries) if i in completed]
+  return deleted, failed
+
 ScriptNoninteractiveRequired = not sys.stdin.isatty() or not sys.stdout.isatty()
 _ScriptNoninteractive = True
 
@@ -8,6 +8,8 @@ from .globals import script_noninteractive
 def nightly_cleanup(repo: str, noop: bool = False) -> None:
   preserved = []
   removed = []
+  # Query the runs only once, and filter them locally for every scan
+  all_runs = list(WorkflowRun.ls(repo))
 
   def _pick_preserved(runs: list[WorkflowRun]) -> list[WorkflowRun]:
     latest = runs[-1]
@@ -19,7 +21,7 @@ def nightly_cleanup(repo: str, noop: bool = False) -> None:
     return result
 
   def _scan_runs(run_type: str, filter: str, remove_all: bool = False) -> list[WorkflowRun]:
-    runs = WorkflowRun.select(repo, filter, noninteractive=True)
+    runs = WorkflowRun.select(repo, filter, runs=all_runs, noninteractive=True)
     if not runs:
       log.warning("[{}] no {} detected", repo, run_type)
     else:
@@ -6,12 +6,19 @@ import subprocess
 TabulateEnabled = True
 TabulateOutput = None
 TabulateColumns = []
+TabulateHeader = b""
+# Buffer size for the pipe to `column`, so that lines are flushed in large chunks
+TabulateBufferSize = 65536
 
 
 def tabulate_columns(*columns: list[str]) -> None:
   global TabulateColumns
+  global TabulateHeader
   TabulateColumns.clear()
   TabulateColumns.extend(columns)
+  TabulateHeader = (
+    "\t".join(col.upper().replace("_", " ") for col in columns) + "\n"
+  ).encode() if columns else b""
 
 
 def output(*fields):
@@ -23,11 +30,10 @@ def output(*fields):
         ["column", "-t", "-s", "\t"],
         stdin=subprocess.PIPE,
         stderr=subprocess.PIPE,
+        bufsize=TabulateBufferSize,
       )
-      if TabulateColumns:
-        columns = "\t".join(col.upper().replace("_", " ") for col in TabulateColumns)
-        TabulateOutput.stdin.write(columns.encode())
-        TabulateOutput.stdin.write("\n".encode())
+      if TabulateHeader:
+        TabulateOutput.stdin.write(TabulateHeader)
     except Exception:
       # The process failed, assume column is not available
       # and don't try to tabulate again
@@ -37,5 +43,4 @@ def output(*fields):
   if not TabulateOutput:
     print(line)
   else:
-    TabulateOutput.stdin.write(line.encode())
-    TabulateOutput.stdin.write("\n".encode())
\ No newline at end of file
+    TabulateOutput.stdin.write(f"{line}\n".encode())
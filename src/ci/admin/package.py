@@ -1,11 +1,11 @@
-from typing import NamedTuple, Generator, TextIO
+from typing import NamedTuple, Generator
 from datetime import datetime
-from functools import partial
 
-from .data_object import DataObject, build, parse
+from .data_object import DataObject, build, iter_parsed
 from cli_helper.log import log
-from .gh_api import gh_api
-from .fzf import fzf_filter
+from .gh_api import gh_api, gh_api_stream
+from .gh_client import GitHubApiError
+from .fzf import fzf_filter, fzf_noninteractive
 
 ###############################################################################
 # GitHub Package data object (parsed from query result)
@@ -18,7 +18,7 @@ class Package(NamedTuple):
   created_at: datetime
   updated_at: datetime
 
-  DatetimeFields = [4, 5]
+  DatetimeFields = frozenset({4, 5})
 
   def __str__(self) -> str:
     return DataObject.str(self)
@@ -38,30 +38,22 @@ class Package(NamedTuple):
     skip_last: bool = False
   ) -> list["Package"]:
     def _ls_packages() -> Generator[Package, None, None]:
-      jq_filter = (
-        "[ (.[] | [.id, .repository.full_name, .name, .visibility, .created_at, .updated_at]) ]"
-      )
       url = (
         f"/orgs/{org}/packages?package_type={package_type}"
         if org
-        else "/user/packages?package_type={package_type}"
+        else f"/user/packages?package_type={package_type}"
       )
       log.activity("listing packages for {}", org if org else "current user")
-      packages = gh_api(url, jq_filter, default=[])
-      for pkg_entry in packages:
-        pkg = build(cls, *pkg_entry)
+      for pkg_entry in gh_api_stream(url):
+        pkg = build(cls,
+          pkg_entry["id"],
+          (pkg_entry.get("repository") or {}).get("full_name"),
+          pkg_entry["name"],
+          pkg_entry["visibility"],
+          pkg_entry["created_at"],
+          pkg_entry["updated_at"])
         yield pkg
 
-    def _read_and_parse_package(input_stream: TextIO) -> list[Package]:
-      return [
-        pkg
-        for line in input_stream.readlines()
-        for sline in [line.decode().strip()]
-        if sline
-        for pkg in [parse(cls, sline)]
-        if pkg
-      ]
-
     if packages is None:
       packages = list(_ls_packages())
 
@@ -71,15 +63,52 @@ class Package(NamedTuple):
 
     if prompt is None:
       prompt = "available packages"
-    sort_packages = partial(sorted, key=lambda p: p.updated_at)
+    sort_key = lambda p: p.updated_at
     fzf = fzf_filter(
       filter=filter,
-      inputs=sort_packages(packages),
+      inputs=sorted(packages, key=sort_key),
       prompt=prompt,
       noninteractive=noninteractive,
     )
-    result = sort_packages(_read_and_parse_package(fzf.stdout))
+    result = list(iter_parsed(cls, fzf.stdout))
+    if fzf_noninteractive(noninteractive):
+      # Matches are already sorted (in reverse order)
+      result.reverse()
+    else:
+      result.sort(key=sort_key)
     if skip_last and result:
       log.warning("[{}] skipping most recent package: {}", org, result[-1])
       result = result[:-1]
     return result
+
+  ###############################################################################
+  # Check if a package exists (optionally, in a specific repository)
+  ###############################################################################
+  @classmethod
+  def exists(
+    cls,
+    package: str,
+    org: str | None = None,
+    package_type: str = "container",
+    repository: str | None = None,
+  ) -> bool:
+    # Look up the package directly, instead of listing all packages
+    url = (
+      f"/orgs/{org}/packages/{package_type}/{package}"
+      if org
+      else f"/user/packages/{package_type}/{package}"
+    )
+    try:
+      pkg_entry = gh_api(url, paginate=False)
+    except GitHubApiError as e:
+      # Any other error (e.g. missing permissions) must not be mistaken
+      # for a missing package
+      if e.status != 404:
+        raise
+      log.debug("package not found: {}", package)
+      return False
+    if not pkg_entry:
+      return False
+    if repository:
+      return (pkg_entry.get("repository") or {}).get("full_name") == repository
+    return True
@@ -1,14 +1,18 @@
 import subprocess
-from typing import NamedTuple, Generator, TextIO
+from typing import NamedTuple, Generator
 from datetime import datetime, timedelta, timezone
 from functools import partial
-import json
+from concurrent.futures import ThreadPoolExecutor
 
-from .data_object import DataObject, parse, build
-from .gh_api import gh_api
-from .fzf import fzf_filter
+from .data_object import DataObject, build, iter_parsed
+from .gh_api import gh_api, gh_api_stream
+from .gh_client import gh_token, ghcr_manifest
+from .fzf import fzf_filter, fzf_noninteractive
+from .globals import delete_concurrently
 
 from cli_helper.log import log
+from cli_helper.json_codec import json_loads
+from cli_helper.http_client import InspectWorkers
 
 ###############################################################################
 # GitHub PackageVersion data object (parsed from query result)
@@ -16,16 +20,41 @@ from cli_helper.log import log
 class PackageVersion(NamedTuple):
   id: str
   name: str
-  tags: str
+  tags: tuple[str, ...]
   created_at: datetime
   updated_at: datetime
 
-  DatetimeFields = [3, 4]
+  DatetimeFields = frozenset({3, 4})
+  TupleFields = frozenset({2})
   DefaultMaxAge = timedelta(days=30)
 
   def __str__(self) -> str:
     return DataObject.str(self)
 
+  ###############################################################################
+  # Query all versions of a package from GitHub
+  ###############################################################################
+  @classmethod
+  def ls(
+    cls,
+    package: str,
+    org: str | None = None,
+    package_type: str = "container",
+  ) -> Generator["PackageVersion", None, None]:
+    url = (
+      f"/orgs/{org}/packages/{package_type}/{package}/versions"
+      if org
+      else f"/user/packages/{package_type}/{package}/versions"
+    )
+    for version_entry in gh_api_stream(url):
+      container = (version_entry.get("metadata") or {}).get("container") or {}
+      yield build(cls,
+        version_entry["id"],
+        version_entry["name"],
+        container.get("tags"),
+        version_entry["created_at"],
+        version_entry["updated_at"])
+
   ###############################################################################
   # List package versions
   ###############################################################################
@@ -42,30 +71,8 @@ class PackageVersion(NamedTuple):
     versions: list["PackageVersion"] | None = None,
     skip_last_tagged: bool = False
   ) -> list["PackageVersion"]:
-    def _ls_versions() -> Generator[PackageVersion, None, None]:
-      jq_filter = "[ (.[] | [.id, .name, .metadata.container.tags, .created_at, .updated_at]) ]"
-      url = (
-        f"/orgs/{org}/packages/{package_type}/{package}/versions"
-        if org
-        else f"/user/packages/{package_type}/{package}/versions"
-      )
-      versions = gh_api(url, jq_filter, default=[])
-      for version_entry in versions:
-        version = build(cls, *version_entry)
-        yield version
-
-    def _read_and_parse_versions(input_stream: TextIO) -> list[PackageVersion]:
-      return [
-        pkg
-        for line in input_stream.readlines()
-        for sline in [line.decode().strip()]
-        if sline
-        for pkg in [parse(cls, sline)]
-        if pkg
-      ]
-
     if versions is None:
-      versions = list(_ls_versions())
+      versions = list(cls.ls(package, org, package_type))
 
     package_label = package if not org else f"{org}/{package}"
 
@@ -83,19 +90,24 @@ class PackageVersion(NamedTuple):
     filter = filter or ""
     filter = f"{filter}{' ' + tags_filter if tags_filter else ''}"
 
-    sort_versions = partial(sorted, key=lambda p: p.updated_at)
+    sort_key = lambda p: p.updated_at
     fzf = fzf_filter(
       filter=filter,
-      inputs=sort_versions(versions),
+      inputs=sorted(versions, key=sort_key),
       prompt=prompt,
       noninteractive=noninteractive,
     )
-    result = sort_versions(_read_and_parse_versions(fzf.stdout))
+    result = list(iter_parsed(cls, fzf.stdout))
+    if fzf_noninteractive(noninteractive):
+      # Matches are already sorted (in reverse order)
+      result.reverse()
+    else:
+      result.sort(key=sort_key)
     if skip_last_tagged and result:
-      latest = next((version for version in reversed(result) if version.tags and version.tags != "[]"), None)
+      latest = next((version for version in reversed(result) if version.tags), None)
       if latest:
         log.warning("[{}] preserving most recently tagged version: {}", package_label, latest)
-        result.remove(latest)
+        result = [version for version in result if version.id != latest.id]
     return result
 
   ###############################################################################
@@ -119,12 +131,7 @@ class PackageVersion(NamedTuple):
     if if_package_exists:
       # Check if the package exists, otherwise return without an error
       from .package import Package
-      filter = f"'{package} "
-      if repository:
-        filter = f"'{repository} {filter}"
-      packages = Package.select(org=org, filter=filter, package_type=package_type, noninteractive=True)
-      package_o = next((pkg for pkg in packages if pkg.name == package), None)
-      if package_o is None:
+      if not Package.exists(package, org=org, package_type=package_type, repository=repository):
         package_label = package if not org else f"{org}/{package}"
         log.warning("[{}] skipping version delete because package doesn't exist", package_label)
         return []
@@ -135,12 +142,9 @@ class PackageVersion(NamedTuple):
         if org
         else f"/user/packages/{package_type}/{package}/versions/{version.id}"
       )
-      delete_cmd = ["gh", "api", "-X", "DELETE", url]
-      log.command(delete_cmd, check=True)
-      subprocess.run(delete_cmd, check=True)
+      gh_api(url, method="DELETE")
 
     package_label = package if not org else f"{org}/{package}"
-    deleted = []
     if prompt is None:
       prompt = "version to delete"
 
@@ -155,10 +159,11 @@ class PackageVersion(NamedTuple):
       skip_last_tagged=skip_last_tagged
     )
 
-    for version in to_be_deleted:
-      if not noop:
-        _delete_version(version)
-      deleted.append(version)
+    failed = []
+    if not noop:
+      deleted, failed = delete_concurrently(_delete_version, to_be_deleted)
+    else:
+      deleted = list(to_be_deleted)
     if noop:
       log.warning(
         "[{}] {} version selected but not actually deleted",
@@ -167,6 +172,8 @@ class PackageVersion(NamedTuple):
       )
     else:
       log.warning("[{}] {} runs DELETED", package_label, len(deleted))
+    if failed:
+      raise RuntimeError("failed to delete versions", package_label, [v for v, _ in failed])
     return deleted
 
   ###############################################################################
@@ -183,23 +190,30 @@ class PackageVersion(NamedTuple):
   ) -> list["PackageVersion"]:
     owner = org or "user"
 
-    tagged_versions = cls.select(package, org, filter="![] ", package_type=package_type)
+    # Query the versions only once, and split them between tagged and untagged
+    all_versions = list(cls.ls(package, org, package_type))
+    tagged_versions = cls.select(package, org, filter="![] ", package_type=package_type, versions=all_versions)
     tagged_names = [v.name for v in tagged_versions]
     # Multi-platform Docker images will report only the top-level manifest as tagged.
     # We must inspect the manifest with `docker buildx imagetools` to retrieve the
     # hashes of all associated layers
     if package_type == "container":
       assert org is not None, "an organization is required"
-      tagged_layers = [layer
-        for manifest in tagged_versions
-        for layer in cls._inspect_docker_manifest(package, org, manifest)]
+      # Each inspection waits on the registry, so overlap them
+      inspect_manifest = partial(cls._inspect_docker_manifest, package, org)
+      with ThreadPoolExecutor(max_workers=InspectWorkers) as executor:
+        tagged_layers = [layer
+          for manifest_layers in executor.map(inspect_manifest, tagged_versions)
+          for layer in manifest_layers]
       tagged_names.extend(tagged_layers)
       tagged_names = sorted(set(tagged_names))
   
+    # Use a set for membership tests, since both lists may be long
+    retained_names = set(tagged_names)
     untagged_versions = [
       v
-      for v in cls.select(package, org, filter="'[] ", package_type=package_type)
-      if v.name not in tagged_names
+      for v in cls.select(package, org, filter="'[] ", package_type=package_type, versions=all_versions)
+      if v.name not in retained_names
     ]
 
     if min_age:
@@ -230,22 +244,18 @@ class PackageVersion(NamedTuple):
       package: str,
       org: str,
       manifest: "PackageVersion") -> list[str]:
-    # tags is a Python string array encoded in a string
-    tags = eval(manifest.tags)
-    manifest_label = next(iter(tags))
-    manifest_image = f"ghcr.io/{org}/{package}:{manifest_label}"
-    cmd = [
-      f"docker buildx imagetools inspect {manifest_image} --raw | "
-      "jq -r \".manifests[].digest\""
-    ]
-    log.command(cmd)
-    result = subprocess.run(cmd, shell=True, check=True, stdout=subprocess.PIPE)
-    if not result.stdout:
-      raise RuntimeError("failed to detect layers for manifest", manifest_image)
-    layers = {
-      layer
-      for layer in result.stdout.decode().strip().splitlines()
-      for layer in [layer.strip()] if layer
-    }
+    manifest_label = next(iter(manifest.tags))
+    if gh_token():
+      # Query the registry directly, instead of going through the docker CLI
+      log.command(["GET", f"ghcr.io/{org}/{package}:{manifest_label}"])
+      index = ghcr_manifest(f"{org}/{package}", manifest_label)
+    else:
+      manifest_image = f"ghcr.io/{org}/{package}:{manifest_label}"
+      cmd = ["docker", "buildx", "imagetools", "inspect", manifest_image, "--raw"]
+      log.command(cmd)
+      result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE)
+      index = json_loads(result.stdout) if result.stdout and not result.stdout.isspace() else {}
+    if not index:
+      raise RuntimeError("failed to detect layers for manifest", org, package, manifest_label)
+    layers = {layer["digest"] for layer in index.get("manifests", [])}
     return list(layers)
-
@@ -10,6 +10,8 @@ from .pr_runs import pr_runs
 def pr_closed(
   repo: str, pr_no: int, merged: bool, noop: bool = False
 ) -> list[tuple[bool, WorkflowRun]]:
+  # Query the runs only once: every following selection reuses (and filters)
+  # this list, without querying GitHub again
   all_runs = pr_runs(repo, pr_no, noninteractive=True)
 
   if not all_runs:
@@ -28,7 +30,8 @@ def pr_closed(
       len(all_runs),
     )
     removed = WorkflowRun.delete(repo, noop=noop, runs=all_runs)
-    preserved = [run for run in all_runs if run not in removed]
+    removed_ids = {run.id for run in removed}
+    preserved = [run for run in all_runs if run.id not in removed_ids]
     return WorkflowRun.action_result(removed, preserved)
 
   log.activity("[{}][PR #{}] listing failed and skipped runs", repo, pr_no)
@@ -104,7 +107,8 @@ def pr_closed(
     actually_removed = []
     log.info("[{}][PR #{}] no runs selected for DELETION", repo, pr_no)
 
-  preserved.extend(run for run in removed if run not in actually_removed)
+  actually_removed_ids = {run.id for run in actually_removed}
+  preserved.extend(run for run in removed if run.id not in actually_removed_ids)
 
   if not actually_removed:
     log.info("[{}][PR #{}] no runs deleted", repo, pr_no)
@@ -1,15 +1,14 @@
 
 import sys
-import subprocess
 from pathlib import Path
-from typing import NamedTuple, TextIO
+from typing import NamedTuple, BinaryIO, Generator
 from datetime import datetime
-from functools import partial
 
 from cli_helper.log import log
-from .fzf import fzf_filter
-from .data_object import DataObject, parse
-from .gh_api import gh_api
+from .fzf import fzf_filter, fzf_noninteractive
+from .data_object import DataObject, iter_parsed
+from .gh_api import gh_api, gh_api_stream
+from .globals import delete_concurrently
 
 ###############################################################################
 # GitHub Workflow Run data object (parsed from query result)
@@ -26,30 +25,16 @@ class WorkflowRun(NamedTuple):
   name: str
 
   Current = ""
-  DatetimeFields = [3, 4]
-  SelectQuery = """\
-def symbol:
-  sub(""; "")? // "NULL" |
-  sub("skipped"; "SKIP") |
-  sub("success"; "GOOD") |
-  sub("startup_failure"; "FAIL") |
-  sub("cancelled"; "FAIL") |
-  sub("failure"; "FAIL");
-
-[ .workflow_runs[]
-  | [
-      .repository.full_name,
-      .head_repository.full_name,
-      .id,
-      .created_at,
-      .updated_at,
-      .event,
-      .status,
-      (.conclusion | symbol),
-      .name
-    ] 
-  ]
-"""
+  DatetimeFields = frozenset({3, 4})
+  # Symbols used to summarize the conclusion of a run
+  ConclusionSymbols = {
+    None: "NULL",
+    "skipped": "SKIP",
+    "success": "GOOD",
+    "startup_failure": "FAIL",
+    "cancelled": "FAIL",
+    "failure": "FAIL",
+  }
 
   def __str__(self) -> str:
     return DataObject.str(self)
@@ -71,11 +56,31 @@ def symbol:
     url = f"/repos/{self.repo}/actions/runs/{self.id}/cancel"
     gh_api(url, method="POST", noop=noop)
 
+  ###############################################################################
+  # Query all workflow runs of a repository from GitHub
+  ###############################################################################
+  @classmethod
+  def ls(cls, repo: str) -> Generator["WorkflowRun", None, None]:
+    run_entries = gh_api_stream(url=f"/repos/{repo}/actions/runs", entries="workflow_runs")
+    for entry in run_entries:
+      if entry["id"] == cls.Current:
+        continue
+      yield DataObject.build(cls,
+        entry["repository"]["full_name"],
+        (entry.get("head_repository") or {}).get("full_name"),
+        entry["id"],
+        entry["created_at"],
+        entry["updated_at"],
+        entry["event"],
+        entry["status"],
+        cls.ConclusionSymbols.get(entry["conclusion"], entry["conclusion"]),
+        entry["name"])
+
   ###############################################################################
   # Query the list of workflow runs from a repository.
   # If no filter is specified, present the user with `fzf` to select targets.
   # Otherwise, run in unattended mode with the provided filter.
-  # By default, the function will query GitHub and parse the result with jq.
+  # By default, the function will query GitHub and parse the result.
   # Optionally, the list of runs can be read from a pregenerated file (or stdin),
   # or it can be passed explicitly with the `runs` parameter.
   ###############################################################################
@@ -90,31 +95,18 @@ def symbol:
     noninteractive: bool = False,
     skip_last: bool = False
   ) -> list["WorkflowRun"]:
-    def _read_and_parse_runs(input_stream: TextIO) -> list[WorkflowRun]:
-      return [
-        run
-        for line in input_stream.readlines()
-        for sline in [line.decode().strip()]
-        if sline
-        for run in [parse(cls, sline)]
-        if run and run.id != cls.Current
-      ]
-    if runs:
+    def _read_and_parse_runs(input_stream: BinaryIO) -> list[WorkflowRun]:
+      return [run for run in iter_parsed(cls, input_stream) if run.id != cls.Current]
+    if runs is not None:
       target_runs = runs
     elif input == "-":
-      target_runs = _read_and_parse_runs(sys.stdin)
+      target_runs = _read_and_parse_runs(sys.stdin.buffer)
     elif input:
       input_file = Path(input)
-      with input_file.open("r") as istream:
+      with input_file.open("rb") as istream:
         target_runs = _read_and_parse_runs(istream)
     else:
-      run_entries = gh_api(
-        url=f"/repos/{repo}/actions/runs",
-        jq_filter=WorkflowRun.SelectQuery,
-        default=[])
-      target_runs = [
-        DataObject.build(cls, *entry) for entry in run_entries if entry[2] != cls.Current
-      ]
+      target_runs = list(cls.ls(repo))
     if prompt is None:
       prompt = "available runs"
     
@@ -122,14 +114,19 @@ def symbol:
       log.warning("[{}] no workflow runs detected", repo)
       return []
 
-    sorted_runs = partial(sorted, key=lambda r: r.created_at)
+    sort_key = lambda r: r.created_at
     fzf = fzf_filter(
       filter=filter,
-      inputs=sorted_runs(target_runs),
+      inputs=sorted(target_runs, key=sort_key),
       prompt=prompt,
       noninteractive=noninteractive,
     )
-    result = sorted_runs(_read_and_parse_runs(fzf.stdout))
+    result = _read_and_parse_runs(fzf.stdout)
+    if fzf_noninteractive(noninteractive):
+      # Matches are already sorted (in reverse order)
+      result.reverse()
+    else:
+      result.sort(key=sort_key)
     if skip_last and result:
       log.warning("[{}] skipping most recent run: {}", repo, result[-1])
       result = result[:-1]
@@ -152,28 +149,19 @@ def symbol:
     def _delete_run(run: WorkflowRun):
       if run.outcome == "NULL":
         run.cancel(noop=noop)
-      delete_cmd = [
-        "gh",
-        "api",
-        "-X",
-        "DELETE",
-        f"/repos/{repo}/actions/runs/{run.id}",
-      ]
-      log.command(delete_cmd, check=True)
-      if not noop:
-        subprocess.run(delete_cmd, check=True)
+      gh_api(f"/repos/{repo}/actions/runs/{run.id}", method="DELETE", noop=noop)
 
-    deleted = []
     if prompt is None:
       prompt = "runs to delete"
 
-    for run in cls.select(repo, filter, input, runs, prompt=prompt, skip_last=keep_last):
-      _delete_run(run)
-      deleted.append(run)
+    selected = cls.select(repo, filter, input, runs, prompt=prompt, skip_last=keep_last)
+    deleted, failed = delete_concurrently(_delete_run, selected)
     if noop:
       log.warning("[{}] {} runs selected but not actually deleted", repo, len(deleted))
     else:
       log.warning("[{}] {} runs DELETED", repo, len(deleted))
+    if failed:
+      raise RuntimeError("failed to delete runs", repo, [run for run, _ in failed])
     return deleted
 
   ###############################################################################
@@ -0,0 +1,85 @@
+import threading
+from typing import NamedTuple
+from email.message import Message
+from http.client import HTTPSConnection, HTTPException
+
+from cli_helper.log import log
+
+HttpTimeout = 60
+HttpUserAgent = "ci-admin"
+# Maximum number of image manifests requested concurrently
+InspectWorkers = 8
+
+# Connections are persistent (HTTP keep-alive), and reused by all requests
+# made by the same thread to the same host.
+_Connections = threading.local()
+
+
+###############################################################################
+# Response returned by http_send()
+###############################################################################
+class HttpResponse(NamedTuple):
+  status: int
+  headers: Message
+  body: bytes
+
+
+###############################################################################
+# Return the current thread's connection to a host, opening it if needed.
+###############################################################################
+def http_connection(host: str) -> HTTPSConnection:
+  conns = getattr(_Connections, "conns", None)
+  if conns is None:
+    conns = _Connections.conns = {}
+  conn = conns.get(host)
+  if conn is None:
+    conn = conns[host] = HTTPSConnection(host, timeout=HttpTimeout)
+  return conn
+
+
+def _http_connection_reset(host: str) -> None:
+  conn = getattr(_Connections, "conns", {}).pop(host, None)
+  if conn is not None:
+    conn.close()
+
+
+###############################################################################
+# Send a request over the current thread's connection to a host
+###############################################################################
+def http_send(
+  host: str,
+  method: str,
+  url: str,
+  body: bytes | None = None,
+  headers: dict[str, str] | None = None,
+) -> HttpResponse:
+  headers = {"User-Agent": HttpUserAgent, **(headers or {})}
+  # Retry once if the server closed the idle connection
+  for retry in (False, True):
+    conn = http_connection(host)
+    try:
+      conn.request(method, url, body=body, headers=headers)
+      response = conn.getresponse()
+      return HttpResponse(response.status, response.headers, response.read())
+    except (HTTPException, ConnectionError) as e:
+      _http_connection_reset(host)
+      if retry:
+        raise
+      log.debug("retrying {} {}{} on new connection ({})", method, host, url, e)
+
+
+###############################################################################
+# Request the raw manifest of an image from a registry (see
+# https://distribution.github.io/distribution/spec/api/#pulling-an-image-manifest)
+###############################################################################
+def manifest_request(
+  host: str,
+  repository: str,
+  reference: str,
+  accept: str,
+  authorization: str | None = None,
+) -> HttpResponse:
+  headers = {"Accept": accept}
+  if authorization:
+    headers["Authorization"] = authorization
+  return http_send(host, "GET", f"/v2/{repository}/manifests/{reference}", headers=headers)
@@ -1,13 +1,20 @@
 from pathlib import Path
 import yaml
 
+# Use libyaml's parser if PyYAML was built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Strings longer than this (or spanning multiple lines) can't be a file path
+MaxPathLength = 4096
+
 def inline_yaml_load(val: str | Path) -> dict:
   # Try to interpret the string as a Path
-  yml_val = val
-  args_file = Path(val)
-  if args_file.is_file():
-    yml_val = args_file.read_text()
+  if isinstance(val, Path) or ("\n" not in val and len(val) < MaxPathLength):
+    args_file = Path(val)
+    if args_file.is_file():
+      with args_file.open("rb") as input:
+        return yaml.load(input, Loader=YamlLoader)
   # Interpret the string as inline YAML
-  if not isinstance(yml_val, str):
+  if not isinstance(val, str):
     raise ValueError("failed to load yaml", val)
-  return yaml.safe_load(yml_val)
+  return yaml.load(val, Loader=YamlLoader)
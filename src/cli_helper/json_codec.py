@@ -0,0 +1,24 @@
+import json
+
+# Use orjson if available, since it is considerably faster than the json module
+try:
+  import orjson
+except Exception:
+  orjson = None
+
+
+def json_loads(val: str | bytes) -> object:
+  if orjson is not None:
+    return orjson.loads(val)
+  return json.loads(val)
+
+
+def json_dumps(val: object, indent: bool = False) -> bytes:
+  if orjson is not None:
+    return orjson.dumps(val, option=orjson.OPT_INDENT_2 if indent else 0)
+  # Match orjson's output: no whitespace (unless indented) and plain UTF-8
+  return json.dumps(
+    val,
+    indent=2 if indent else None,
+    separators=None if indent else (",", ":"),
+    ensure_ascii=False).encode()
@@ -5,27 +5,53 @@ from typing import Protocol, NamedTuple
 ###############################################################################
 # mini logger API
 ###############################################################################
-ColorEnabled = sys.stderr.isatty() and not os.environ.get("NO_COLORS", False)
+# Colors are disabled if stderr is not a terminal, if the terminal doesn't
+# support them, or if requested by the user (see https://no-color.org)
+ColorEnabled = (
+  sys.stderr.isatty()
+  and os.environ.get("TERM") != "dumb"
+  and not os.environ.get("NO_COLOR")
+  and not os.environ.get("NO_COLORS")
+)
 try:
   import termcolor
 except Exception:
   ColorEnabled = False
 
+LogColors = {
+  "D": "magenta",
+  "A": "cyan",
+  "I": "green",
+  "W": "yellow",
+  "E": "red",
+}
 
-def _log_msg(lvl, fmt, *args, **print_args) -> None:
-  print_args.setdefault("file", sys.stderr)
+
+def _log_line(lvl, fmt, *args) -> str:
   line = fmt.format(*args) if args else fmt
-  line = f"[{lvl}]" + ("" if line.startswith("[") else " ") + line
-  if ColorEnabled:
-    color = {
-      "D": "magenta",
-      "A": "cyan",
-      "I": "green",
-      "W": "yellow",
-      "E": "red",
-    }[lvl]
-    line = termcolor.colored(line, color)
-  print(line, **print_args)
+  return f"[{lvl}]" + ("" if line.startswith("[") else " ") + line
+
+
+def _log_msg_plain(lvl, fmt, *args, **print_args) -> None:
+  line = _log_line(lvl, fmt, *args)
+  if print_args:
+    print_args.setdefault("file", sys.stderr)
+    print(line, **print_args)
+  else:
+    sys.stderr.write(f"{line}\n")
+
+
+def _log_msg_color(lvl, fmt, *args, **print_args) -> None:
+  line = termcolor.colored(_log_line(lvl, fmt, *args), LogColors[lvl])
+  if print_args:
+    print_args.setdefault("file", sys.stderr)
+    print(line, **print_args)
+  else:
+    sys.stderr.write(f"{line}\n")
+
+
+# Select the implementation only once, since the result never changes
+_log_msg = _log_msg_color if ColorEnabled else _log_msg_plain
 
 
 def _log_debug(*args, **print_args) -> None:
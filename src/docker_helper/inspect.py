@@ -14,47 +14,65 @@
 # limitations under the License.
 ###############################################################################
 import subprocess
-import json
 from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from cli_helper.log import log
+from cli_helper.json_codec import json_loads, json_dumps
+from cli_helper.http_client import InspectWorkers
+from .registry import registry_manifest
+
+def _inspect_image(img: str) -> dict:
+  # Query the registry directly, and only fall back to the (much slower to
+  # start) docker CLI if that's not possible
+  img_index = registry_manifest(img)
+  if img_index is not None:
+    return img_index
+  cmd = [
+    "docker", "buildx", "imagetools", "inspect", img, "--raw"
+  ]
+  log.command(cmd)
+  result = subprocess.run(cmd, stdout=subprocess.PIPE, check=True)
+  return json_loads(result.stdout)
 
 def inspect(
-    images: str,
+    images: str | list[str],
     hashes: dict[str, str],
     output: str,
+    pretty: bool = False,
 ) -> None:
   hashes = hashes or {}
-  images = [img.strip() for img in images.strip().splitlines()]
-  log.debug("inspecting {} docker images", len(images))
+  # Images are passed as a list, or as a newline-separated string
+  if isinstance(images, str):
+    images = images.strip().splitlines()
+  img_list = [img.strip() for img in images]
+  log.debug("inspecting {} docker images", len(img_list))
   r_images = {}
-  r_layers = {}
-  for img in images:
-    cmd = [
-      "docker", "buildx", "imagetools", "inspect", img, "--raw"
-    ]
-    log.command(cmd)
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, check=True)
-    stdout = result.stdout.decode().strip()
-    r_images[img] = json.loads(stdout)
+  r_layers = defaultdict(set)
+  # Every image is inspected by an independent (mostly waiting) process,
+  # so run them concurrently
+  with ThreadPoolExecutor(max_workers=max(1, min(InspectWorkers, len(img_list)))) as executor:
+    img_indexes = list(executor.map(_inspect_image, img_list))
+  for img, img_index in zip(img_list, img_indexes):
+    r_images[img] = img_index
     img_hash = hashes.get(img)
-    r_images[img]["manifest_hash"] = img_hash or ""
+    img_index["manifest_hash"] = img_hash or ""
     if img_hash:
-      layer_images = r_layers[img_hash] = r_layers.get(img_hash, set())
-      layer_images.add(img)
-    for img_manifest in r_images[img]["manifests"]:
-      layer_digest = img_manifest["digest"]
-      layer_images = r_layers[layer_digest] = r_layers.get(layer_digest, set())
-      layer_images.add(img)
+      r_layers[img_hash].add(img)
+    for img_manifest in img_index["manifests"]:
+      r_layers[img_manifest["digest"]].add(img)
   result = {
     "images": r_images,
     "layers": {
-      layer: list(images)
-      for layer, images in r_layers.items()
+      layer: list(layer_images)
+      for layer, layer_images in r_layers.items()
     },
   }
   output = Path(str(output).strip())
   output.parent.mkdir(exist_ok=True, parents=True)
-  with output.open("w") as outstream:
-    outstream.write(json.dumps(result, indent=2))
+  # The manifests are only read by other tools, so they are written in
+  # compact form, unless requested otherwise
+  with output.open("wb") as outstream:
+    outstream.write(json_dumps(result, indent=pretty))
 
@@ -0,0 +1,136 @@
+###############################################################################
+# Copyright 2020-2024 Andrea Sorbini
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+import os
+import re
+import base64
+import subprocess
+from pathlib import Path
+from functools import lru_cache
+from urllib.parse import urlsplit, urlencode
+from http.client import HTTPException
+
+from cli_helper.log import log
+from cli_helper.json_codec import json_loads
+from cli_helper.http_client import http_send, manifest_request
+
+# Docker Hub's images are served by a different host than the one used
+# in image names (and in the credentials stored by `docker login`)
+DockerHubRegistry = "docker.io"
+DockerHubHost = "registry-1.docker.io"
+DockerHubAuthKey = "https://index.docker.io/v1/"
+# Same media types accepted by `docker buildx imagetools inspect --raw`
+ManifestAccept = ", ".join([
+  "application/vnd.oci.image.index.v1+json",
+  "application/vnd.docker.distribution.manifest.list.v2+json",
+  "application/vnd.oci.image.manifest.v1+json",
+  "application/vnd.docker.distribution.manifest.v2+json",
+])
+
+
+###############################################################################
+# Split an image name into (registry, repository, reference)
+###############################################################################
+def parse_image(img: str) -> tuple[str, str, str]:
+  name, sep, reference = img.partition("@")
+  if not sep:
+    # The tag follows the last ":", unless it's part of the registry's port
+    name, sep, reference = img.rpartition(":")
+    if not sep or "/" in reference:
+      name, reference = img, "latest"
+  registry, sep, repository = name.partition("/")
+  if not sep or not re.search(r"[.:]|^localhost$", registry):
+    registry, repository = DockerHubRegistry, name
+  if registry == DockerHubRegistry and "/" not in repository:
+    repository = f"library/{repository}"
+  return registry, repository, reference
+
+
+###############################################################################
+# Look up the credentials stored by `docker login` for a registry.
+# Return None if none are available.
+###############################################################################
+@lru_cache(maxsize=None)
+def registry_credentials(registry: str) -> tuple[str, str] | None:
+  config_dir = Path(os.environ.get("DOCKER_CONFIG") or Path.home() / ".docker")
+  try:
+    config = json_loads((config_dir / "config.json").read_bytes())
+  except (OSError, ValueError):
+    return None
+  auth_key = DockerHubAuthKey if registry == DockerHubRegistry else registry
+  auth = (config.get("auths") or {}).get(auth_key, {}).get("auth")
+  if auth:
+    user, _, secret = base64.b64decode(auth).decode().partition(":")
+    return user, secret
+  helper = (config.get("credHelpers") or {}).get(registry) or config.get("credsStore")
+  if not helper:
+    return None
+  try:
+    result = subprocess.run(
+      [f"docker-credential-{helper}", "get"],
+      input=auth_key.encode(),
+      stdout=subprocess.PIPE,
+      stderr=subprocess.DEVNULL,
+      check=True)
+    creds = json_loads(result.stdout)
+  except Exception:
+    return None
+  return creds["Username"], creds["Secret"]
+
+
+###############################################################################
+# Request a bearer token as instructed by a registry's WWW-Authenticate header
+###############################################################################
+def _registry_token(challenge: str, creds: tuple[str, str] | None) -> str | None:
+  params = dict(re.findall(r'(\w+)="([^"]*)"', challenge))
+  if not challenge.startswith("Bearer") or "realm" not in params:
+    return None
+  realm = urlsplit(params.pop("realm"))
+  headers = {}
+  if creds:
+    headers["Authorization"] = f"Basic {base64.b64encode(':'.join(creds).encode()).decode()}"
+  url = f"{realm.path}?{urlencode(params)}"
+  status, _, body = http_send(realm.netloc, "GET", url, headers=headers)
+  if status >= 400:
+    return None
+  token = json_loads(body)
+  return token.get("token") or token.get("access_token")
+
+
+###############################################################################
+# Retrieve the raw manifest of an image directly from its registry.
+# Return None if the manifest could not be retrieved (e.g. because the
+# registry requires credentials which are not available).
+###############################################################################
+def registry_manifest(img: str) -> dict | None:
+  registry, repository, reference = parse_image(img)
+  host = DockerHubHost if registry == DockerHubRegistry else registry
+  try:
+    status, response_headers, body = manifest_request(host, repository, reference, ManifestAccept)
+    if status == 401:
+      token = _registry_token(
+        response_headers.get("WWW-Authenticate", ""), registry_credentials(registry))
+      if not token:
+        return None
+      status, _, body = manifest_request(host, repository, reference, ManifestAccept,
+        authorization=f"Bearer {token}")
+  except (OSError, HTTPException) as e:
+    log.debug("failed to query registry for {}: {}", img, e)
+    return None
+  if status >= 400:
+    log.debug("failed to query registry for {}: {}", img, status)
+    return None
+  return json_loads(body)
+
@@ -18,21 +18,42 @@ from pathlib import Path
 
 from cli_helper.log import log
 
-from .config_user import config_user
+# Maximum number of files passed to a single `git add`
+GitAddBatchSize = 1000
 
-def commit(clone_dir: Path, message: str, user: tuple[str, str] | None = None, untracked: list[Path] | None = None, push: bool=True) -> None:
-  if user:
-    config_user(clone_dir, user, config_global=False)
-
-  for file in (untracked or []):
-    cmd = ["git", "add", file]
+def commit(
+    clone_dir: Path,
+    message: str,
+    user: tuple[str, str] | None = None,
+    untracked: list[Path] | None = None,
+    push: bool=True,
+    no_verify: bool=False,
+    no_gpg_sign: bool=False) -> None:
+  # Add all files with a single git process (in batches, to stay well
+  # below the maximum length of a command line)
+  untracked = [str(file) for file in (untracked or [])]
+  for i in range(0, len(untracked), GitAddBatchSize):
+    cmd = ["git", "add", "--", *untracked[i:i + GitAddBatchSize]]
     log.command(cmd)
     subprocess.run(cmd, check=True, cwd=clone_dir)
 
-  cmd = ["git", "commit", "-am", message,]
+  # Pass the user to the commit command directly, instead of configuring it
+  # in the clone with separate `git config` processes
+  user_args = [
+    "-c", f"user.name={user[0]}",
+    "-c", f"user.email={user[1]}",
+  ] if user else []
+  # Hooks and signing can be skipped by automated commits (hooks spawn
+  # additional processes), but only on request, since the repository may
+  # rely on them (e.g. to require signed commits)
+  commit_args = [
+    *(["--no-verify"] if no_verify else []),
+    *(["--no-gpg-sign"] if no_gpg_sign else []),
+  ]
+  cmd = ["git", *user_args, "commit", *commit_args, "-am", message,]
   log.command(cmd)
   subprocess.run(cmd, check=True, cwd=clone_dir)
   if push:
-    cmd = ["git", "push",]
+    cmd = ["git", "push", *(["--no-verify"] if no_verify else []),]
     log.command(cmd)
     subprocess.run(cmd, check=True, cwd=clone_dir)
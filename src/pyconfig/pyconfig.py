@@ -16,11 +16,31 @@
 import yaml
 import json
 import os
+import sys
 import subprocess
 from pathlib import Path
 from collections import namedtuple
+from functools import lru_cache
 from typing import NamedTuple
 
+# Use libyaml's parser/emitter if PyYAML was built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Print the intermediate settings generated by configuration() only when
+# debugging, since serializing them is the most expensive part of it
+PyconfigDebug = (
+  os.environ.get("PYCONFIG_DEBUG") == "1"
+  or os.environ.get("RUNNER_DEBUG") == "1"
+)
+
+# Use libgit2's bindings if available, to query repositories without
+# spawning git
+try:
+  import pygit2
+except Exception:
+  pygit2 = None
+
 ###############################################################################
 #
 ###############################################################################
@@ -37,14 +57,23 @@ def dict_to_tuple(key: str, val: dict, bool_to_str: bool=False) -> NamedTuple:
       v = k if v else ''
     fields[k] = v
 
-  keys = list(fields.keys())
+  keys = tuple(fields.keys())
   if not keys:
     return tuple()
 
-  val_cls = namedtuple(key, keys)
+  val_cls = _tuple_class(key, keys)
   return val_cls(**fields)
 
 
+###############################################################################
+# Generating a namedtuple class is expensive, so reuse the class of every
+# (name, fields) combination
+###############################################################################
+@lru_cache(maxsize=None)
+def _tuple_class(key: str, keys: tuple[str, ...]) -> type[NamedTuple]:
+  return namedtuple(key, keys)
+
+
 ###############################################################################
 #
 ###############################################################################
@@ -75,22 +104,15 @@ def dict_bool_to_str(val: dict) -> dict:
 #
 ###############################################################################
 def _select_attribute(ctx: tuple | dict, selector: str) -> str:
-  def _getattr(obj: tuple | dict, k: str):
-    if isinstance(obj, dict):
-      return obj[k]
-    else:
-      return getattr(obj, k)
-
-  def _lookup_recur(current: tuple | dict, selector_parts: list[str]) -> str:
-    selected = _getattr(current, selector_parts[0])
-    if len(selector_parts) == 1:
-      return selected
-    return _lookup_recur(selected, selector_parts[1:])
-
-  selector_parts = selector.split(".")
-  if not selector_parts:
+  if not selector:
     raise RuntimeError("a non-empty selector is required")
-  return _lookup_recur(ctx, selector_parts)
+  selected = ctx
+  for k in selector.split("."):
+    if isinstance(selected, dict):
+      selected = selected[k]
+    else:
+      selected = getattr(selected, k)
+  return selected
 
 
 ###############################################################################
@@ -98,21 +120,26 @@ def _select_attribute(ctx: tuple | dict, selector: str) -> str:
 ###############################################################################
 def merge_dicts(result: dict, defaults: dict) -> dict:
   merged = {}
-  for k in {*result.keys(), *defaults.keys()}:
-    res_v = result.get(k)
-    def_v = defaults.get(k)
-    if def_v is None and res_v is None:
-      continue
-    elif def_v is None:
-      v = res_v
-    elif res_v is None:
-      v = def_v
-    elif isinstance(def_v, dict):
-      assert isinstance(res_v, dict)
-      v = merge_dicts(res_v, def_v)
-    else:
-      v = res_v
-    merged[k] = v
+  # Merge nested dictionaries iteratively, one level at a time
+  pending = [(merged, result, defaults)]
+  while pending:
+    merged_lvl, result_lvl, defaults_lvl = pending.pop()
+    for k in {*result_lvl.keys(), *defaults_lvl.keys()}:
+      res_v = result_lvl.get(k)
+      def_v = defaults_lvl.get(k)
+      if def_v is None and res_v is None:
+        continue
+      elif def_v is None:
+        v = res_v
+      elif res_v is None:
+        v = def_v
+      elif isinstance(def_v, dict):
+        assert isinstance(res_v, dict)
+        v = {}
+        pending.append((v, res_v, def_v))
+      else:
+        v = res_v
+      merged_lvl[k] = v
   return merged
 
 
@@ -120,15 +147,42 @@ def merge_dicts(result: dict, defaults: dict) -> dict:
 #
 ###############################################################################
 def sha_short(clone_dir: Path | str) -> str:
-  return (
-    subprocess.run(
-      ["git", "rev-parse", "--short", "HEAD"],
-      cwd=clone_dir,
-      stdout=subprocess.PIPE,
-    )
-    .stdout.decode()
-    .strip()
-  )
+  if pygit2 is not None:
+    repo_dir = pygit2.discover_repository(str(clone_dir))
+    if repo_dir:
+      return pygit2.Repository(repo_dir).revparse_single("HEAD").short_id
+  return subprocess.run(
+    ["git", "rev-parse", "--short", "HEAD"],
+    cwd=clone_dir,
+    stdout=subprocess.PIPE,
+    text=True,
+  ).stdout.strip()
+
+
+###############################################################################
+# Serialize a value to YAML (in the same format as yaml.safe_dump())
+###############################################################################
+def yaml_dump(val: object) -> str:
+  return yaml.dump(val, Dumper=YamlDumper)
+
+
+###############################################################################
+# Print a value as YAML in a collapsible group of the job's log (in debug mode)
+###############################################################################
+def _dump_group(title: str, val: object) -> None:
+  if not PyconfigDebug:
+    return
+  print(f"::group::{title}")
+  print(yaml_dump(val))
+  print("::endgroup::")
+
+
+###############################################################################
+# Parse settings.yml
+###############################################################################
+def _load_settings_yml(cfg_file: Path) -> dict:
+  with cfg_file.open("rb") as input:
+    return yaml.load(input, Loader=YamlLoader)
 
 
 ###############################################################################
@@ -178,27 +232,26 @@ def write_output(
       val = var.lower() if val else ""
     elif not isinstance(val, str):
       val = str(val)
-    print(f"{var} = {repr(val)}")
+    summary.append(f"{var} = {repr(val)}\n")
     if "\n" not in val:
-      output.write(var)
-      output.write("=")
-      if val:
-        output.write(val)
-      output.write("\n")
+      output.append(f"{var}={val}\n")
     else:
-      output.write(f"{var}<<EOF" "\n")
-      output.write(val)
-      output.write("\n")
-      output.write("EOF\n")
+      output.append(f"{var}<<EOF\n{val}\nEOF\n")
+
+  # Collect all outputs, then write them with a single call
+  summary = []
+  output = []
+  for var in export_env or []:
+    val = os.environ.get(var, "")
+    _output(var, val)
+  for var, val in (vars or {}).items():
+    _output(var, val)
 
   print("::group::Step Outputs")
+  sys.stdout.write("".join(summary))
   github_output = Path(os.environ["GITHUB_OUTPUT"])
-  with github_output.open("a") as output:
-    for var in export_env or []:
-      val = os.environ.get(var, "")
-      _output(var, val)
-    for var, val in (vars or {}).items():
-      _output(var, val)
+  with github_output.open("a") as output_stream:
+    output_stream.write("".join(output))
   print("::endgroup::")
 
 
@@ -246,34 +299,26 @@ def configuration(
 
   github_dict = _json_load(github.strip())
   github = dict_to_tuple("github", github_dict)
-  print("::group::GitHub Context")
-  print(yaml.safe_dump(github_dict))
-  print("::endgroup::")
+  _dump_group("GitHub Context", github_dict)
 
   inputs = (inputs or "").strip()
   if inputs:
     inputs_dict = _json_load(inputs.strip())
     inputs = dict_to_tuple("inputs", inputs_dict)
-    print("::group::Inputs")
-    print(yaml.safe_dump(tuple_to_dict(inputs)))
-    print("::endgroup::")
+    _dump_group("Inputs", tuple_to_dict(inputs))
 
   cfg_file = config_dir / "settings.yml"
   if cfg_file.exists():
-    cfg_dict = yaml.safe_load(cfg_file.read_text())
+    cfg_dict = _load_settings_yml(cfg_file)
   else:
     cfg_dict = {}
-  print("::group::Static Settings (settings.yml)")
-  print(yaml.safe_dump(cfg_dict))
-  print("::endgroup::")
+  _dump_group("Static Settings (settings.yml)", cfg_dict)
 
   cfg_mod_py = config_dir / "settings.py"
   if cfg_mod_py.exists():
     cfg_mod = load_file_as_module(cfg_mod_py)
     derived_cfg = cfg_mod.settings(clone_dir=clone_dir, cfg=dict_to_tuple("settings", cfg_dict), github=github)
-    print("::group::Dynamic Settings")
-    print(yaml.safe_dump(derived_cfg))
-    print("::endgroup::")
+    _dump_group("Dynamic Settings", derived_cfg)
   else:
     derived_cfg = {}
 
@@ -290,9 +335,7 @@ def configuration(
     },
   )
 
-  print("::group::Project Settings")
-  print(yaml.safe_dump(cfg_dict))
-  print("::endgroup::")
+  _dump_group("Project Settings", cfg_dict)
 
   project_cfg = dict_to_tuple("settings", cfg_dict)
 
@@ -305,14 +348,10 @@ def configuration(
       )
     else:
       workflow_cfg = {}
-    print(f"::group::Workflow {workflow} Settings")
-    print(yaml.safe_dump(workflow_cfg))
-    print("::endgroup::")
+    _dump_group(f"Workflow {workflow} Settings", workflow_cfg)
 
     cfg_dict = merge_dicts(workflow_cfg, cfg_dict)
-    print("::group::Final Settings")
-    print(yaml.safe_dump(cfg_dict))
-    print("::endgroup::")
+    _dump_group("Final Settings", cfg_dict)
   else:
     workflow_mod = None
 
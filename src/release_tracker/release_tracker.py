@@ -13,22 +13,177 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 ###############################################################################
+import os
+import gc
 import sys
 import yaml
-import json
 import re
 import shutil
+import hashlib
 import argparse
-import tempfile
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-from typing import NamedTuple
+from typing import NamedTuple, Callable, Iterable
 from enum import Enum
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Used to clone files on copy-on-write filesystems (e.g. btrfs, XFS)
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
 
 from git_helper import commit as git_commit, config_user as git_config_user
-from docker_helper import inspect as inspect_docker
 from cli_helper.log import log
-from cli_helper.inline_yaml import inline_yaml_load
+from cli_helper.inline_yaml import inline_yaml_load, YamlLoader
+from cli_helper.json_codec import json_loads, json_dumps
+
+# Use libyaml's emitter if PyYAML was built with it (YamlLoader falls back
+# to the pure-Python parser in the same way)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Maximum number of files copied concurrently
+CopyWorkers = 8
+# Maximum number of version directories removed concurrently. Removals are
+# mostly unlink() calls (which release the GIL), so scale with the CPUs
+# (like ThreadPoolExecutor's default)
+DeleteWorkers = min(32, (os.cpu_count() or 1) + 4)
+
+# ioctl(2) request which makes a file share the data of another one (Linux only)
+FICLONE = 0x40049409
+
+def _load_file(path: Path, parse: Callable[[bytes], object]) -> object | None:
+  # Return None if the file doesn't exist
+  try:
+    data = path.read_bytes()
+  except FileNotFoundError:
+    return None
+  return parse(data)
+
+
+def _parse_release_log(release_log: bytes) -> list[dict]:
+  # Parse all entries with a single call, as one JSON array
+  entries = [line for line in release_log.splitlines() if line.strip()]
+  return json_loads(b"[" + b",".join(entries) + b"]")
+
+
+def _parse_docker_layers(docker_manifests: bytes) -> frozenset[str]:
+  return frozenset(json_loads(docker_manifests)["layers"].keys())
+
+
+def _hash_tracks_yml(tracks_yml: bytes) -> str:
+  return hashlib.sha256(tracks_yml).hexdigest()
+
+
+@lru_cache(maxsize=64)
+def _compile_re(pattern: str) -> re.Pattern:
+  return re.compile(pattern)
+
+
+def _parse_date(date: str) -> datetime:
+  # Timestamps have a fixed width (YYYY-MM-DDTHH:MM:SSZ), so check the
+  # separators and slice the fields directly instead of going through strptime(),
+  # which still validates (and rejects) anything else
+  if len(date) == 20 and date[4::3] == "--T::Z":
+    return datetime(
+      int(date[0:4]),
+      int(date[5:7]),
+      int(date[8:10]),
+      int(date[11:13]),
+      int(date[14:16]),
+      int(date[17:19]),
+      tzinfo=timezone.utc)
+  parsed = datetime.strptime(date, ReleaseTracker.DateFormat)
+  return parsed.replace(tzinfo=timezone.utc)
+
+
+def _format_date(date: datetime) -> str:
+  return (
+    f"{date.year:04d}-{date.month:02d}-{date.day:02d}"
+    f"T{date.hour:02d}:{date.minute:02d}:{date.second:02d}Z"
+  )
+
+
+def _release_created_at(created_at: str | None) -> str:
+  # Timestamps are stored as strings (in ReleaseTracker.DateFormat), so
+  # that they can be serialized, and used to build version ids
+  created_at = created_at.strip() if created_at else ""
+  if created_at:
+    # Validate the timestamp's format
+    _parse_date(created_at)
+    return created_at
+  return _format_date(datetime.now(timezone.utc))
+
+
+def _write_file(path: Path, data: bytes | Iterable[bytes]) -> None:
+  # Write to a temporary file and rename it, so that the file is never
+  # left partially written. The contents may be generated in chunks, to
+  # avoid holding all of them in memory.
+  tmp_path = path.with_name(f".{path.name}.tmp")
+  try:
+    with tmp_path.open("wb") as output:
+      if isinstance(data, bytes):
+        output.write(data)
+      else:
+        output.writelines(data)
+    os.replace(tmp_path, path)
+  except BaseException:
+    tmp_path.unlink(missing_ok=True)
+    raise
+
+
+def _remove_dir(path: str) -> bool:
+  # Return False if the directory doesn't exist, and let any other error
+  # propagate, so that it isn't mistaken for a successful removal
+  try:
+    shutil.rmtree(path)
+  except FileNotFoundError:
+    return False
+  return True
+
+
+def _copy_file(src: Path, dst: Path) -> None:
+  # Try to clone the file first, which doesn't copy any data, then to copy
+  # it in the kernel with copy_file_range(), and finally fall back to a
+  # regular copy (which uses sendfile() when possible)
+  if sys.platform == "linux":
+    try:
+      with src.open("rb") as src_f, dst.open("wb") as dst_f:
+        _copy_file_linux(src_f.fileno(), dst_f.fileno())
+      shutil.copystat(src, dst)
+      return
+    except OSError:
+      pass
+  shutil.copy2(src, dst)
+
+
+def _link_file(src: Path, dst: Path) -> None:
+  # Share the source file instead of copying it (only possible within the
+  # same filesystem). The file must not be modified afterwards.
+  try:
+    dst.unlink(missing_ok=True)
+    os.link(src, dst)
+  except OSError:
+    _copy_file(src, dst)
+
+
+def _copy_file_linux(src_fd: int, dst_fd: int) -> None:
+  if fcntl is not None:
+    try:
+      fcntl.ioctl(dst_fd, FICLONE, src_fd)
+      return
+    except OSError:
+      pass
+  if not hasattr(os, "copy_file_range"):
+    raise OSError("copy_file_range() not available")
+  remaining = os.fstat(src_fd).st_size
+  while remaining > 0:
+    copied = os.copy_file_range(src_fd, dst_fd, remaining)
+    if copied == 0:
+      break
+    remaining -= copied
+
 
 class PrunePolicy(Enum):
   LATEST = 0
@@ -43,7 +198,15 @@ class ReleaseTrack(NamedTuple):
 
 class ReleaseTracker:
   TracksConfigFile = "tracks.yml"
-  ReleaseLogFile = "release-log.json"
+  # Copy of tracks.yml written by initialize(), which is faster to parse.
+  # It records a hash of tracks.yml, so that it is ignored if the
+  # configuration is edited by hand.
+  TracksJsonFile = "tracks.json"
+  # One JSON object per line, so that new entries can be appended to the log
+  ReleaseLogFile = "release-log.jsonl"
+  # Logs created by older versions store a single JSON array. They are
+  # still read, and converted the next time the log is rewritten.
+  LegacyReleaseLogFile = "release-log.json"
   DateFormat = "%Y-%m-%dT%H:%M:%SZ"
   DefaultTracks = """
 tracks:
@@ -56,7 +219,9 @@ tracks:
 """
 
   @classmethod
+  @lru_cache(maxsize=None)
   def define_parser(cls) -> argparse.ArgumentParser:
+    # The parser is built only once, and reused by every call to main()
     parser = argparse.ArgumentParser("release-tracker")    
     parser.set_defaults(action=None)
 
@@ -130,6 +295,10 @@ tracks:
       help="A file to store for the new version.")
     parser_add.add_argument("-V", "--version",
       help="Label for the new version")
+    parser_add.add_argument("-L", "--hardlink",
+      help="Hard-link the files instead of copying them, when they are on the same filesystem. The files must not be modified afterwards.",
+      default=False,
+      action="store_true")
 
 
     parser_add_docker = subparsers.add_parser(
@@ -163,7 +332,7 @@ tracks:
       help="Match based on version label.",
       default=None)
     parser_find.add_argument("-R", "--regex",
-      help="Match based on a regular expression.",
+      help="Match based on a regular expression over the whole version id ({created_at}__{version}).",
       default=None)
     parser_find.add_argument("--compact",
       help="Print only layer hashes insted of full manifests.",
@@ -184,7 +353,7 @@ tracks:
       help="Match based on version label.",
       default=None)
     parser_del.add_argument("-R", "--regex",
-      help="Match based on a regular expression.",
+      help="Match based on a regular expression over the whole version id ({created_at}__{version}).",
       default=None)
 
 
@@ -241,7 +410,8 @@ tracks:
         track=args.track,
         version=args.version,
         created_at=args.created_at,
-        files="\n".join(map(str, args.file)),
+        files=args.file,
+        hardlink=args.hardlink,
         commit=args.commit,
         push=args.push)
     elif args.action == "add-docker":
@@ -249,7 +419,7 @@ tracks:
         track=args.track,
         version=args.version,
         created_at=args.created_at,
-        images="\n".join(map(str, args.image)),
+        images=args.image,
         commit=args.commit,
         push=args.push)
     elif args.action == "find":
@@ -258,7 +428,7 @@ tracks:
         version=args.version,
         created_at=args.created_at,
         match_re=args.regex)
-      print(yaml.safe_dump(matched))
+      sys.stdout.write(yaml.dump(matched, Dumper=YamlDumper) + "\n")
     elif args.action == "del":
       tracker.delete(
         track=args.track,
@@ -272,14 +442,14 @@ tracks:
        prunable_layers,
        unprunable_versions,
        unprunable_layers) = tracker.find_prunable_docker_layers()
-      for layer in prunable_layers:
-        print("-", layer)
-      for layer in unprunable_layers:
-        print("+", layer)
+      # Write all lines at once, since there may be many of them
+      sys.stdout.write("".join([
+        *(f"- {layer}\n" for layer in prunable_layers),
+        *(f"+ {layer}\n" for layer in unprunable_layers),
+      ]))
     elif args.action == "find-prunable":
       prunable = tracker.find_prunable(track=args.track)
-      for pruned in prunable:
-        print(pruned)
+      sys.stdout.write("".join(f"{pruned}\n" for pruned in prunable))
     else:
       raise RuntimeError("action not implemented", args.action)
 
@@ -297,11 +467,44 @@ tracks:
     self.path = Path(str(path).strip())
     self.storage = self.path / storage.strip()
     self._release_logs = {}
-    tracks_yml = self.storage / self.TracksConfigFile
-    self.tracks: dict[str, ReleaseTrack] = (
-      {} if not tracks_yml.exists()
-      else self.load_tracks(yaml.safe_load(tracks_yml.read_text())["tracks"])
-    )
+    # Positions of each track's entries in the release log, by timestamp
+    self._release_indexes: dict[str, dict[str, list[int]]] = {}
+    # Version ids of each track's entries, in the same order as the log
+    self._release_ids: dict[str, list[str]] = {}
+    # Loaded from tracks.yml on first access, since most operations only
+    # need the release logs
+    self._tracks: dict[str, ReleaseTrack] | None = None
+    # Directory of each track, built only once
+    self._track_dirs: dict[str, Path] = {}
+
+  @property
+  def tracks(self) -> dict[str, ReleaseTrack]:
+    if self._tracks is None:
+      self._tracks = self.load_tracks(self._load_tracks_config())
+    return self._tracks
+
+  @tracks.setter
+  def tracks(self, tracks: dict[str, ReleaseTrack]) -> None:
+    self._tracks = tracks
+
+  def track_dir(self, track: str) -> Path:
+    track_dir = self._track_dirs.get(track)
+    if track_dir is None:
+      track_dir = self._track_dirs[track] = self.storage / track
+    return track_dir
+
+  def _load_tracks_config(self) -> list[dict]:
+    try:
+      tracks_yml = (self.storage / self.TracksConfigFile).read_bytes()
+    except FileNotFoundError:
+      return []
+    try:
+      tracks_json = json_loads((self.storage / self.TracksJsonFile).read_bytes())
+    except (FileNotFoundError, ValueError):
+      tracks_json = None
+    if tracks_json is not None and tracks_json.get("source") == _hash_tracks_yml(tracks_yml):
+      return tracks_json["tracks"]
+    return yaml.load(tracks_yml, Loader=YamlLoader)["tracks"]
 
   @classmethod
   def load_tracks(cls, tracks: list[dict]) -> dict:
@@ -328,33 +531,49 @@ tracks:
   def configure_clone(self, user: tuple[str, str]):
     git_config_user(clone_dir=self.path, user=user)
 
+  def _commit(self, message: str, untracked: list[Path], push: bool) -> None:
+    # Releases are committed by automation, so skip the repository's hooks
+    git_commit(
+      clone_dir=self.path,
+      message=message,
+      untracked=untracked,
+      push=push,
+      no_verify=True)
+
   def initialize(self,
-      project_repo: str,
-      tracks: str,
+      tracks: str | dict,
       commit: bool = False,
       push: bool = False) -> None:
     # Load release tracks configuration
-    tracks = tracks.strip()
-    if not tracks:
-      tracks = self.DefaultTracks
-    self.tracks = self.load_tracks(yaml.safe_load(tracks)["tracks"])
+    if not isinstance(tracks, dict):
+      tracks = yaml.load(tracks.strip() or self.DefaultTracks, Loader=YamlLoader)
+    self.tracks = self.load_tracks(tracks["tracks"])
 
-    # Create base directory and write tracks.yml
+    # Create base directory and write tracks.yml (and tracks.json)
     self.storage.mkdir(exist_ok=True, parents=True)
 
-    tracks_yml = self.storage / self.TracksConfigFile
-    tracks_yml.write_text(self.serialize_tracks(self.tracks))
+    tracks_cfg = self.serialize_tracks(self.tracks)
+    tracks_yml = yaml.dump(
+      tracks_cfg,
+      Dumper=YamlDumper,
+      default_flow_style=False,
+      # Keep each track's name first, like in DefaultTracks
+      sort_keys=False).encode()
+    _write_file(self.storage / self.TracksConfigFile, tracks_yml)
+    _write_file(self.storage / self.TracksJsonFile, json_dumps({
+      "source": _hash_tracks_yml(tracks_yml),
+      **tracks_cfg,
+    }))
 
     # Initialize track directories
     for track in self.tracks.keys():
-      track_dir = self.storage / track.name
+      track_dir = self.track_dir(track)
       track_dir.mkdir(exist_ok=True)
       track_log = track_dir / self.ReleaseLogFile
-      track_log.write_text(json.dumps([]))
+      track_log.touch()
 
     if (commit or push):
-      git_commit(
-        clone_dir=self.path,
+      self._commit(
         message="[tracker] initialized",
         untracked=[self.storage.relative_to(self.path)],
         push=push)
@@ -363,35 +582,38 @@ tracks:
       track: str,
       version: str,
       created_at: str | None = None,
-      files: str | None = None,
+      files: str | list[str | Path] | None = None,
+      hardlink: bool = False,
       commit: bool = False,
-      push: bool = False) -> dict:
-    # Read current log contents
-    release_log = self.release_log(track)
+      push: bool = False,
+      stored_files: list[str] | None = None) -> dict:
+    created_at = _release_created_at(created_at)
 
-    created_at = created_at.strip() if created_at else ""
-    if created_at:
-      created_at = datetime.strptime(created_at, self.DateFormat)
-    else:
-      created_at = datetime.now(timezone.utc).strftime(self.DateFormat)
-
-    # Read release version
+    # Read release version (entries are stored stripped, see release_ids())
+    version = version.strip()
     version_id = self.version_id(created_at, version)
 
-    # Copy release files
-    files = files or ""
-    files = [Path(f.strip()) for f in files.strip().splitlines()]
+    # Copy release files (passed as a list, or as a newline-separated string)
+    if isinstance(files, str):
+      files = [f.strip() for f in files.strip().splitlines()]
+    files = [Path(f) for f in files or []]
 
-    track_dir = self.storage / track
+    track_dir = self.track_dir(track)
 
-    version_files = []
+    # Files which were already written to the version's directory
+    version_files = [track_dir / version_id / f for f in stored_files or []]
     if files:
       version_dir = track_dir / version_id
       version_dir.mkdir(exist_ok=True, parents=True)
-      for f_src in files:
-        f_dst = version_dir / f_src.name
-        shutil.copy2(f_src, f_dst)
-        version_files.append(f_dst)
+      copied_files = [version_dir / f_src.name for f_src in files]
+      store_file = _link_file if hardlink else _copy_file
+      if len(files) == 1:
+        store_file(files[0], copied_files[0])
+      else:
+        # Files are independent, so copy them concurrently
+        with ThreadPoolExecutor(max_workers=min(CopyWorkers, len(files))) as executor:
+          list(executor.map(store_file, files, copied_files))
+      version_files.extend(copied_files)
 
     # Add release log entry
     version_entry = {
@@ -399,19 +621,15 @@ tracks:
       "files": [str(f.relative_to(track_dir)) for f in version_files],
       "version": version,
     }
-    release_log.append(version_entry)
-    self.write_release_log(track, release_log)
+    self.append_release_log(track, version_entry)
 
     log.info("ADDED {}", version_id)
 
     if (commit or push):
-      untracked = []
-      if track_dir.exists():
-        untracked.append(track_dir.relative_to(self.path))
-      git_commit(
-        clone_dir=self.path,
+      # The track directory exists, since the entry was appended to its log
+      self._commit(
         message=f"[tracker][{track}][new][{version}] {created_at}",
-        untracked=untracked,
+        untracked=[track_dir.relative_to(self.path)],
         push=push)
       log.info("changes COMMITED{}", "" if not push else " and PUSHED")
 
@@ -421,116 +639,122 @@ tracks:
   def add_docker(self,
       track: str,
       version: str,
-      images: str,
-      hashes: str,
+      images: str | list[str],
+      hashes: dict[str, str] | None = None,
       created_at: str | None = None,
       commit: bool = False,
       push: bool = False) -> dict:
-    tmp_h = tempfile.TemporaryDirectory()
-    tmp_dir = Path(tmp_h.name)
-    manifest = tmp_dir / "docker-manifests.json"
-    inspect_docker(images, hashes, manifest)
+    # Only needed by this method, and relatively expensive to import
+    # (docker_helper pulls in the HTTP client used to query registries)
+    from docker_helper import inspect as inspect_docker
+
+    # Write the manifests directly to the version's directory, instead of
+    # generating them elsewhere and copying them
+    created_at = _release_created_at(created_at)
+    version_dir = self.track_dir(track) / self.version_id(created_at, version)
+    manifest = "docker-manifests.json"
+    try:
+      inspect_docker(images, hashes, version_dir / manifest)
+    except Exception:
+      shutil.rmtree(version_dir, ignore_errors=True)
+      raise
     return self.add(
       track=track,
       version=version,
-      files="\n".join(map(str, [
-        manifest,
-      ])),
       created_at=created_at,
       commit=commit,
-      push=push)
+      push=push,
+      stored_files=[manifest])
 
 
   def find_prunable(self,
       track: str
     ) -> list[str]:
     def _find_prunable_unique():
-      # Keep the most recent release for every version
-      versions_by_id = {}
-      for version in self.release_log(track):
-        version_id = self.version_id(version["created_at"], version["version"])
-        vid_versions = versions_by_id[version_id] = versions_by_id.get(version_id, [])
-        vid_versions.append(version_id)
-      return sorted({
+      # Keep the most recent release for every version, i.e. the last
+      # entry with each version label (dicts keep the last value assigned)
+      release_log = self.release_log(track)
+      latest = {release["version"]: i for i, release in enumerate(release_log)}
+      return [
         vid
-        for versions in versions_by_id.items()
-        for vid in versions[:-1] # skip most recent recent release for every version
-      })
+        for i, (vid, release) in enumerate(zip(self.release_ids(track), release_log))
+          if latest[release["version"]] != i
+      ]
 
     def _find_prunable_latest():
       # Keep only the most recent release for the track
-      return sorted({
-        vid
-        for version in self.release_log(track)[:-1]
-        for vid in [self.version_id(version["created_at"], version["version"])]
-      })
+      return self.release_ids(track)[:-1]
 
     track_cfg = self.tracks[track]
     log.info("[{}] pruning with policy: {}", track, track_cfg.prune_policy)
-    if track_cfg.prune_policy == "unique":
+    # Every policy keeps the most recent release
+    if len(self.release_ids(track)) <= 1:
+      return []
+    if track_cfg.prune_policy is PrunePolicy.UNIQUE:
       prunable = _find_prunable_unique()
     else:
       prunable = _find_prunable_latest()
     
     if track_cfg.prune_max_age > 0:
       max_age = timedelta(days=track_cfg.prune_max_age)
-      old_enough = []
-      now = datetime.now()
-      for version_id in prunable:
-        v_date = datetime.strptime(version_id[:version_id.index("__")], self.DateFormat)
-        if now - v_date < max_age:
-          continue
-        old_enough.append(version_id)
-      prunable = old_enough
+      # Timestamps are in UTC, and have a fixed width, so they sort (and can
+      # be compared) like the dates they represent, without parsing them
+      cutoff = _format_date(datetime.now(timezone.utc) - max_age)
+      prunable = [
+        version_id
+        for version_id in prunable
+          if version_id[:version_id.index("__")] <= cutoff
+      ]
 
     return prunable
 
 
-  def find_prunable_docker_layers(self) -> tuple[list[str], list[str]]:
-    def _load_layers(track_dir: Path, version_id: str) -> list[str]:
-      version_dir = track_dir / version_id
-      docker_manifests_f = version_dir / "docker-manifests.json"
-      if not docker_manifests_f.exists():
-        log.debug("[{}][{}] not a docker release", version_id)
-        return set()
-      docker_manifests = json.loads(docker_manifests_f.read_text())
-      return set(docker_manifests["layers"].keys())
-
-    prunable_versions = {}
-    for track in self.tracks.keys():
-      track_versions = self.find_prunable(track)
-      if not track_versions:
-        log.warning("[{}] no prunable versions specified nor detected", track)
-        continue
-      prunable_versions[track] = track_versions
+  def find_prunable_docker_layers(self) -> tuple[
+      set[tuple[str, str]], set[str], set[tuple[str, str]], set[str]]:
+    def _load_layers(track_dir: Path, version_id: str) -> frozenset[str]:
+      docker_manifests_f = track_dir / version_id / "docker-manifests.json"
+      layers = _load_file(docker_manifests_f, _parse_docker_layers)
+      if layers is None:
+        log.debug("[{}][{}] not a docker release", track_dir.name, version_id)
+        return frozenset()
+      return layers
 
+    # Versions are identified by (track, version_id), since the same
+    # version id may be used by multiple tracks
     prunable_docker_versions = set()
     unprunable_layers = set()
     unprunable_docker_versions = set()
+    # Layers of every docker version, so that they are only loaded once
+    version_layers = {}
 
-    for track, track_versions in prunable_versions.items():
-      track_dir = self.storage / track
-      for version_entry in self.release_log(track):
-        version_id = self.version_id(version_entry["created_at"], version_entry["version"])
+    # Inspect each track right after finding its prunable versions, while
+    # its release log is already loaded. Tracks without prunable versions
+    # must still be inspected, since their layers can't be pruned.
+    for track in self.tracks.keys():
+      track_prunable = set(self.find_prunable(track))
+      if not track_prunable:
+        log.warning("[{}] no prunable versions specified nor detected", track)
+      track_dir = self.track_dir(track)
+      for version_id in self.release_ids(track):
         v_layers = _load_layers(track_dir, version_id)
         if not v_layers:
           continue
         log.debug("[{}][{}] inspecting version ({} layers)", track, version_id, len(v_layers))
-        if version_id not in prunable_versions:
-          unprunable_layers = unprunable_layers | v_layers
-          unprunable_docker_versions.add(version_id)
+        version = (track, version_id)
+        version_layers[version] = v_layers
+        if version_id not in track_prunable:
+          unprunable_layers.update(v_layers)
+          unprunable_docker_versions.add(version)
         else:
-          prunable_docker_versions.add(version_id)
-    
-    prunable_layers = {
-      layer
-      for version_id in prunable_docker_versions
-        for layer in _load_layers(version_id)
-          if layer not in unprunable_layers
-    }
-    log.info("[{}] {} prunable layers from {} docker versions", track, len(prunable_docker_versions), len(prunable_layers))
-    log.info("[{}] {} unprunable layers from {} docker versions", track, len(unprunable_docker_versions), len(unprunable_layers))
-    
+          prunable_docker_versions.add(version)
+
+    prunable_layers = set()
+    for version in prunable_docker_versions:
+      prunable_layers.update(version_layers[version])
+    prunable_layers.difference_update(unprunable_layers)
+    log.info("{} prunable layers from {} docker versions", len(prunable_layers), len(prunable_docker_versions))
+    log.info("{} unprunable layers from {} docker versions", len(unprunable_layers), len(unprunable_docker_versions))
+
     return (prunable_docker_versions, prunable_layers, unprunable_docker_versions, unprunable_layers)
 
 
@@ -538,16 +762,77 @@ tracks:
     release_log = self._release_logs.get(track)
     if release_log is not None:
       return release_log
-    release_log_f = self.storage / track / self.ReleaseLogFile
-    release_log = json.loads(release_log_f.read_text())
+    # Decoding allocates many small containers, which would repeatedly trigger
+    # the cyclic garbage collector, although they can't contain any cycle
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+      track_dir = self.track_dir(track)
+      legacy_release_log_f = track_dir / self.LegacyReleaseLogFile
+      release_log_f = track_dir / self.ReleaseLogFile
+      # Entries of a legacy log are read first, since they are older
+      release_log = [
+        *(_load_file(legacy_release_log_f, json_loads) or []),
+        *(_load_file(release_log_f, _parse_release_log) or []),
+      ]
+    finally:
+      if gc_enabled:
+        gc.enable()
     self._release_logs[track] = release_log
     return release_log
 
 
+  def append_release_log(self, track: str, version_entry: dict) -> None:
+    release_log_f = self.track_dir(track) / self.ReleaseLogFile
+    with release_log_f.open("ab") as output:
+      output.write(json_dumps(version_entry) + b"\n")
+    # Update the log (and its indexes) only if it has already been loaded
+    release_log = self._release_logs.get(track)
+    if release_log is None:
+      return
+    release_log.append(version_entry)
+    release_index = self._release_indexes.get(track)
+    if release_index is not None:
+      release_index.setdefault(version_entry["created_at"], []).append(len(release_log) - 1)
+    release_ids = self._release_ids.get(track)
+    if release_ids is not None:
+      release_ids.append(f"{version_entry['created_at']}__{version_entry['version']}")
+
+
   def write_release_log(self, track: str, release_log: list[dict]) -> None:
-    release_log_f = self.storage / track / self.ReleaseLogFile
-    release_log_f.write_text(json.dumps(release_log, indent=2))
+    track_dir = self.track_dir(track)
+    release_log_f = track_dir / self.ReleaseLogFile
+    _write_file(release_log_f, (json_dumps(entry) + b"\n" for entry in release_log))
+    # The legacy log's entries are now part of the new one
+    legacy_release_log_f = track_dir / self.LegacyReleaseLogFile
+    legacy_release_log_f.unlink(missing_ok=True)
     self._release_logs[track] = release_log
+    self._release_indexes.pop(track, None)
+    self._release_ids.pop(track, None)
+
+
+  def release_ids(self, track: str) -> list[str]:
+    release_ids = self._release_ids.get(track)
+    if release_ids is not None:
+      return release_ids
+    # Entries are stored stripped, so their ids are built without version_id()
+    release_ids = [
+      f"{release['created_at']}__{release['version']}"
+      for release in self.release_log(track)
+    ]
+    self._release_ids[track] = release_ids
+    return release_ids
+
+
+  def release_index(self, track: str) -> dict[str, list[int]]:
+    release_index = self._release_indexes.get(track)
+    if release_index is not None:
+      return release_index
+    release_index = {}
+    for i, release in enumerate(self.release_log(track)):
+      release_index.setdefault(release["created_at"], []).append(i)
+    self._release_indexes[track] = release_index
+    return release_index
 
 
   def find(self,
@@ -562,43 +847,52 @@ tracks:
     match_re = (match_re or "").strip()
     version = (version or "").strip()
     created_at = (created_at or "").strip()
-    entries = (entries or "").strip()
+    entries = {e.strip() for e in (entries or "").splitlines() if e.strip()}
 
-    # Find candidates
+    # Select the matching entries in a single pass over the log (or only over
+    # the entries with the requested timestamps, if any).
+    # Version ids are cached by release_ids(), so they are only built if needed
+    release_ids = (
+      self.release_ids(track) if (versions_only or entries or match_re) else None
+    )
+
+    positions = range(len(release_log))
     if entries:
-      candidates = [
-        (i, release)
-        for i, release in enumerate(release_log)
-          for vid in [self.version_id(release["created_at"], release["version"])]
-            if vid in entries
-      ]
+      release_index = self.release_index(track)
+      positions = sorted({
+        i
+        for entry in entries
+        for i in release_index.get(entry.partition("__")[0], [])
+      })
+      def _match(i: int) -> bool:
+        return release_ids[i] in entries
     elif match_re:
-      # Search by regex
-      match_re = re.compile(match_re.strip())
-      candidates = [
-        (i, release)
-        for i, release in enumerate(release_log)
-          if match_re.match(
-              self.version_id(release["created_at"], release["version"]))
-      ]
+      # Search by regex (which must match the whole version id), directly
+      # over the cached ids
+      fullmatch = _compile_re(match_re).fullmatch
+      positions = [i for i, vid in enumerate(release_ids) if fullmatch(vid)]
+      _match = None
     else:
-      created_at = created_at or ""
-      version = version or ""
+      # Plain string comparisons are faster than an equivalent (anchored)
+      # regular expression, and they don't require the entry's id
       created_at, version_suffix = self.version_id(created_at, version).split("__")
-      candidates = [
-        (i, release)
-        for i, release in enumerate(release_log)
-        if release["version"].endswith(version_suffix)
+      if created_at:
+        positions = self.release_index(track).get(created_at, [])
+      def _match(i: int) -> bool:
+        release = release_log[i]
+        return (
+          release["version"].endswith(version_suffix)
           and (
             not created_at
             or release["created_at"] == created_at
           )
-      ]
-    if not versions_only:
-      return candidates
+        )
+
+    if _match is not None:
+      positions = [i for i in positions if _match(i)]
     return [
-      (i, self.version_id(release["created_at"], release["version"]))
-        for i, release in candidates
+      (i, release_ids[i] if versions_only else release_log[i])
+      for i in positions
     ]
 
 
@@ -622,24 +916,45 @@ tracks:
       versions_only=True,
       entries=entries)
 
-    track_dir = self.storage / track
-
-    popped = 0
-    for i, version_id in candidates:
-      release_log.pop(i - popped)
-      popped += 1
-      version_dir = track_dir / version_id
-      if not version_dir.exists():
-        continue
-      shutil.rmtree(version_dir)
-      log.info("DELETED {}", version_id)
-
-    self.write_release_log(track, release_log)
+    track_dir = self.track_dir(track)
+
+    if candidates:
+      # Versions without files have no directory.
+      # Report every version as soon as its directory has been removed.
+      # Versions whose directory could not be removed are kept in the log,
+      # the others are dropped from it before the failure is reported.
+      track_dir_str = str(track_dir)
+      deleted = set()
+      failed = []
+      with ThreadPoolExecutor(max_workers=min(DeleteWorkers, len(candidates))) as executor:
+        removals = {
+          executor.submit(_remove_dir, f"{track_dir_str}/{version_id}"): (i, version_id)
+          for i, version_id in candidates
+        }
+        for removal in as_completed(removals):
+          i, version_id = removals[removal]
+          try:
+            removed = removal.result()
+          except Exception as e:
+            log.error("failed to delete {}: {}", version_id, e)
+            failed.append(version_id)
+            continue
+          deleted.add(i)
+          log.info("DELETED {}{}", version_id, "" if removed else " (no files)")
+
+      # Rebuild the log in a single pass, and rewrite it only once
+      release_log[:] = [
+        release for i, release in enumerate(release_log) if i not in deleted
+      ]
+      self.write_release_log(track, release_log)
+      if failed:
+        raise RuntimeError("failed to delete versions", track, failed)
 
-    if popped and (commit or push):
-      git_commit(
-        clone_dir=self.path,
+    if candidates and (commit or push):
+      self._commit(
         message=f"[tracker][{track}][del] {len(candidates)} versions",
+        # The log is new if it was converted from the legacy format
+        untracked=[(track_dir / self.ReleaseLogFile).relative_to(self.path)],
         push=push)
       log.info("changes COMMITED{}", "" if not push else " and PUSHED")
     else: